@@ -0,0 +1,258 @@
+"""
+Index of the skeleton-based metrics of the baseline segmentations. The
+weighted average of every metric is precomputed for every block and stored
+in a small NPZ file in the user cache directory, so that scoring does not
+reread the baseline CSV files for each submission. The index also stores a
+hash of each CSV file and is rebuilt automatically if any of them changes.
+It can be rebuilt in parallel by running
+
+    python -m image_compression_challenge.baseline_index
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
+from segmentation_skeleton_metrics.utils.util import compute_weighted_avg
+
+import hashlib
+import numpy as np
+import os
+import pandas as pd
+
+from image_compression_challenge.gt_store import CACHE_ROOT
+
+BASELINE_DIR = Path(__file__).resolve().parent.joinpath(
+    "baseline_segmentation_results"
+)
+INDEX_PATH = os.path.join(CACHE_ROOT, "baseline_index.npz")
+WEIGHT_COLUMN = "SWC Run Length"
+
+
+# --- Build ---
+def build_index(
+    index_path=INDEX_PATH, baseline_dir=BASELINE_DIR, max_workers=1
+):
+    """
+    Computes the weighted average of every metric for every block from the
+    baseline CSV files, then saves the results together with a hash of each
+    CSV file as an NPZ file.
+
+    Parameters
+    ----------
+    index_path : str, optional
+        Path that the index is saved to. Default is INDEX_PATH.
+    baseline_dir : str, optional
+        Directory containing one "results_{num}.csv" file per block. Default
+        is BASELINE_DIR.
+    max_workers : int, optional
+        Maximum number of processes. Default is 1, which means that blocks
+        are processed serially in the calling process. If None, then the
+        number of CPUs is used.
+
+    Returns
+    -------
+    dict
+        Dictionary that maps block numbers to a dictionary that maps metric
+        names to weighted averages.
+    """
+    # Compute weighted averages
+    csv_hashes = get_csv_hashes(baseline_dir)
+    nums = sorted(csv_hashes)
+    compute_fn = partial(compute_block_averages, baseline_dir=baseline_dir)
+    if max_workers == 1:
+        avgs = list(map(compute_fn, nums))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            avgs = list(executor.map(compute_fn, nums))
+    index = dict(zip(nums, avgs))
+
+    # Save index
+    metrics = sorted({metric for avg in avgs for metric in avg})
+    values = [[avg.get(m, np.nan) for m in metrics] for avg in avgs]
+    try:
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            nums=np.array(nums, dtype=str),
+            metrics=np.array(metrics, dtype=str),
+            values=np.array(values, dtype=np.float64).reshape(len(nums), -1),
+            csv_hashes=np.array([csv_hashes[n] for n in nums], dtype=str),
+        )
+        os.replace(tmp_path, index_path)
+    except OSError:
+        print(f"Warning: unable to save baseline index to {index_path}")
+    return index
+
+
+def compute_block_averages(num, baseline_dir=BASELINE_DIR):
+    """
+    Computes the weighted average of every metric for the baseline
+    segmentation of the given block.
+
+    Parameters
+    ----------
+    num : str
+        Unique identifier for an image block.
+    baseline_dir : str, optional
+        Directory containing one "results_{num}.csv" file per block. Default
+        is BASELINE_DIR.
+
+    Returns
+    -------
+    dict
+        Dictionary that maps metric names to weighted averages.
+    """
+    df = load_baseline_segmentation_result(num, baseline_dir)
+    metrics = df.select_dtypes("number").columns
+    return {
+        metric: float(compute_weighted_avg(df, metric))
+        for metric in metrics
+        if metric != WEIGHT_COLUMN and not metric.startswith("Unnamed")
+    }
+
+
+# --- Load ---
+@lru_cache(maxsize=None)
+def load_index(index_path=INDEX_PATH, baseline_dir=BASELINE_DIR):
+    """
+    Loads the index of the baseline metrics, which is rebuilt first if it
+    does not exist or if any baseline CSV file has changed since it was
+    built. The result is memoized, so the index is read at most once per
+    process.
+
+    Parameters
+    ----------
+    index_path : str, optional
+        Path to the index. Default is INDEX_PATH.
+    baseline_dir : str, optional
+        Directory containing one "results_{num}.csv" file per block. Default
+        is BASELINE_DIR.
+
+    Returns
+    -------
+    dict
+        Dictionary that maps block numbers to a dictionary that maps metric
+        names to weighted averages.
+    """
+    if not os.path.exists(index_path):
+        return build_index(index_path, baseline_dir)
+
+    with np.load(index_path) as npz:
+        # Check whether index is stale
+        csv_hashes = get_csv_hashes(baseline_dir)
+        if "csv_hashes" not in npz.files or csv_hashes != dict(
+            zip(map(str, npz["nums"]), map(str, npz["csv_hashes"]))
+        ):
+            print("Baseline CSV files changed, rebuilding baseline index")
+            return build_index(index_path, baseline_dir)
+
+        # Read index
+        metrics = [str(m) for m in npz["metrics"]]
+        return {
+            str(num): dict(zip(metrics, map(float, values)))
+            for num, values in zip(npz["nums"], npz["values"])
+        }
+
+
+def get_weighted_avg(
+    num, metric, index_path=INDEX_PATH, baseline_dir=BASELINE_DIR
+):
+    """
+    Gets the weighted average of a metric for the baseline segmentation of
+    the given block.
+
+    Parameters
+    ----------
+    num : str
+        Unique identifier for an image block.
+    metric : str
+        Name of metric.
+    index_path : str, optional
+        Path to the index. Default is INDEX_PATH.
+    baseline_dir : str, optional
+        Directory containing one "results_{num}.csv" file per block. Default
+        is BASELINE_DIR.
+
+    Returns
+    -------
+    float
+        Weighted average of the metric.
+    """
+    return load_index(index_path, baseline_dir)[num][metric]
+
+
+# --- Helpers ---
+def get_csv_hashes(baseline_dir=BASELINE_DIR):
+    """
+    Computes a hash of the contents of each baseline CSV file.
+
+    Parameters
+    ----------
+    baseline_dir : str, optional
+        Directory containing one "results_{num}.csv" file per block. Default
+        is BASELINE_DIR.
+
+    Returns
+    -------
+    dict
+        Dictionary that maps block numbers to SHA-1 hashes.
+    """
+    csv_hashes = dict()
+    for path in Path(baseline_dir).glob("results_*.csv"):
+        num = path.stem.split("_")[-1]
+        csv_hashes[num] = hashlib.sha1(path.read_bytes()).hexdigest()
+    return csv_hashes
+
+
+def fill_nan_results(df):
+    """
+    Replaces NaN values in 'Merge Rate' and 'Split Rate' columns with values
+    from 'SWC Run Length'.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data frame containing skeleton metric results on the baseline
+        segmentation.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Data frame containing skeleton metric results with NaN values
+        replaced.
+    """
+    # Approximate actual run length
+
+    # Fill NaNs
+    df["Merge Rate"] = df["Merge Rate"].fillna(df["SWC Run Length"])
+    df["Split Rate"] = df["Split Rate"].fillna(df["SWC Run Length"])
+    return df
+
+
+def load_baseline_segmentation_result(num, baseline_dir=BASELINE_DIR):
+    """
+    Loads the skeleton-based metric results for the baseline segmentation for
+    the image block corresponding to "num".
+
+    Parameters
+    ----------
+    num : str
+        Unique identifier for an image block.
+    baseline_dir : str, optional
+        Directory containing one "results_{num}.csv" file per block. Default
+        is BASELINE_DIR.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Skeleton-based metric results for the baseline segmentation.
+    """
+    path = f"{baseline_dir}/results_{num}.csv"
+    return fill_nan_results(pd.read_csv(path))
+
+
+if __name__ == "__main__":
+    index = build_index(max_workers=None)
+    print(f"Saved baseline index with {len(index)} blocks to {INDEX_PATH}")
@@ -0,0 +1,225 @@
+"""
+Routines for running inference on an image block chunk by chunk, so that
+neither the image nor the predictions need to fit in memory.
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import itertools
+import numpy as np
+import tifffile
+
+BIGTIFF_BYTES = 2**32 - 2**25
+
+
+def predict_by_chunk(
+    img,
+    predict,
+    output_path,
+    chunk_shape,
+    halo,
+    accumulator=None,
+):
+    """
+    Predicts affinities over spatial chunks of an image, where each chunk is
+    padded by a halo that is trimmed from the prediction before it is
+    written to a memory-mapped file. The next chunk is read while the
+    current one is being predicted.
+
+    Parameters
+    ----------
+    img : tensorstore.TensorStore or numpy.ndarray
+        Image with shape (Z, Y, X).
+    predict : callable
+        Function that takes an image chunk and returns affinities with shape
+        (C, Z, Y, X).
+    output_path : str
+        Path to NPY file that affinities are written to.
+    chunk_shape : Tuple[int]
+        Shape of chunks that affinities are predicted over.
+    halo : Tuple[int]
+        Number of voxels added to each side of a chunk along each axis.
+    accumulator : qc.QCAccumulator, optional
+        QC statistics that are updated with the first affinity channel of each
+        chunk. Default is None.
+
+    Returns
+    -------
+    affinities : numpy.memmap
+        Affinities with shape (C, Z, Y, X).
+    """
+    affinities = None
+    chunks = list(iter_chunks(img.shape, chunk_shape))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        padded = add_halo(chunks[0], halo, img.shape)[0]
+        pending = executor.submit(_read, img, padded)
+        for i, chunk in enumerate(chunks):
+            # Read chunk and prefetch next chunk
+            crop = add_halo(chunk, halo, img.shape)[1]
+            chunk_img = pending.result()
+            if i + 1 < len(chunks):
+                padded = add_halo(chunks[i + 1], halo, img.shape)[0]
+                pending = executor.submit(_read, img, padded)
+
+            # Predict affinities
+            chunk_affs = predict(chunk_img)
+            if affinities is None:
+                affinities = np.lib.format.open_memmap(
+                    output_path,
+                    mode="w+",
+                    dtype=chunk_affs.dtype,
+                    shape=(chunk_affs.shape[0],) + tuple(img.shape),
+                )
+            chunk_affs = chunk_affs[(slice(None),) + crop]
+            affinities[(slice(None),) + chunk] = chunk_affs
+            if accumulator is not None:
+                accumulator.update(chunk_affs[0], chunk)
+    affinities.flush()
+    return affinities
+
+
+# --- Chunking ---
+def iter_chunks(shape, chunk_shape):
+    """
+    Iterates over the chunks that tile an image.
+
+    Parameters
+    ----------
+    shape : Tuple[int]
+        Shape of image.
+    chunk_shape : Tuple[int]
+        Shape of chunks.
+
+    Yields
+    ------
+    Tuple[slice]
+        Region of image covered by a chunk.
+    """
+    starts = [range(0, s, c) for s, c in zip(shape, chunk_shape)]
+    for start in itertools.product(*starts):
+        yield tuple(
+            slice(i, min(i + c, s))
+            for i, c, s in zip(start, chunk_shape, shape)
+        )
+
+
+def add_halo(chunk, halo, shape):
+    """
+    Pads a chunk by a halo that is clipped to the image bounds.
+
+    Parameters
+    ----------
+    chunk : Tuple[slice]
+        Region of image covered by a chunk.
+    halo : Tuple[int]
+        Number of voxels added to each side of the chunk along each axis.
+    shape : Tuple[int]
+        Shape of image.
+
+    Returns
+    -------
+    padded : Tuple[slice]
+        Region of image covered by the padded chunk.
+    crop : Tuple[slice]
+        Region of the padded chunk that corresponds to the original chunk.
+    """
+    padded, crop = list(), list()
+    for s, h, bound in zip(chunk, halo, shape):
+        start, stop = max(s.start - h, 0), min(s.stop + h, bound)
+        padded.append(slice(start, stop))
+        crop.append(slice(s.start - start, s.stop - start))
+    return tuple(padded), tuple(crop)
+
+
+# --- Writing ---
+def write_tiff_by_slab(
+    path, img, slab_depth, shape=None, dtype=np.uint16, accumulators=()
+):
+    """
+    Writes an image to a TIFF file one z-slab at a time, so that only a
+    single slab is converted to "dtype" and held in memory at once. The file
+    is written as a BigTIFF if it could exceed 4 GB, as in
+    "tifffile.imwrite".
+
+    Parameters
+    ----------
+    path : str
+        Path that TIFF file is written to.
+    img : tensorstore.TensorStore or numpy.ndarray
+        Image with shape (Z, Y, X).
+    slab_depth : int
+        Number of z-slices read at a time.
+    shape : Tuple[int], optional
+        Shape of the TIFF image, which must be the shape of "img" with
+        optional leading singleton dimensions. Default is None, which means
+        that the shape of "img" is used.
+    dtype : numpy.dtype, optional
+        Data type of TIFF file. Default is np.uint16.
+    accumulators : Iterable, optional
+        Objects with an "update(chunk, region)" method, such as
+        "qc.QCAccumulator", that are updated with each slab as written.
+        Default is an empty tuple.
+    """
+
+    # Subroutines
+    def iter_pages():
+        """
+        Iterates over the z-slices of the image.
+
+        Yields
+        ------
+        numpy.ndarray
+            Z-slice of the image.
+        """
+        for z0 in range(0, img.shape[0], slab_depth):
+            z1 = min(z0 + slab_depth, img.shape[0])
+            slab = _read(img, (slice(z0, z1),)).astype(dtype)
+            for accumulator in accumulators:
+                accumulator.update(slab, (slice(z0, z1),))
+            for page in slab:
+                yield page
+
+    # Main
+    shape = tuple(shape or img.shape)
+    with tifffile.TiffWriter(path, bigtiff=is_bigtiff(shape, dtype)) as tiff:
+        tiff.write(iter_pages(), shape=shape, dtype=dtype, compression="zlib")
+
+
+def is_bigtiff(shape, dtype):
+    """
+    Checks whether an image needs to be written as a BigTIFF, using the same
+    threshold as "tifffile.imwrite".
+
+    Parameters
+    ----------
+    shape : Tuple[int]
+        Shape of image.
+    dtype : numpy.dtype
+        Data type of image.
+
+    Returns
+    -------
+    bool
+        Indication of whether the image needs to be written as a BigTIFF.
+    """
+    return int(np.prod(shape)) * np.dtype(dtype).itemsize > BIGTIFF_BYTES
+
+
+def _read(img, region):
+    """
+    Reads a region of an image into memory.
+
+    Parameters
+    ----------
+    img : tensorstore.TensorStore or numpy.ndarray
+        Image to be read.
+    region : Tuple[slice]
+        Region of image to be read.
+
+    Returns
+    -------
+    numpy.ndarray
+        Region of image.
+    """
+    return np.asarray(img[region])
@@ -9,11 +9,16 @@ Runs image segmentation pipeline for a dataset of image blocks.
 """
 
 from aind_exaspim_neuron_segmentation import inference
-from aind_exaspim_neuron_segmentation.utils import img_util, util
+from aind_exaspim_neuron_segmentation.utils import util
 
 import numpy as np
 import os
-import tifffile
+
+from image_compression_challenge import qc, utils
+from image_compression_challenge.chunked_inference import (
+    predict_by_chunk,
+    write_tiff_by_slab,
+)
 
 
 def main():
@@ -22,20 +27,21 @@ def main():
     """
     # Initializations
     model = inference.load_model(model_path, affinity_mode=affinity_mode)
-    mips_dir = os.path.join(output_dir, "MIPs")
+    qc_dir = os.path.join(output_dir, "QC")
     util.mkdir(output_dir)
-    util.mkdir(mips_dir)
+    util.mkdir(qc_dir)
 
     # Main
     for n in range(5, 10):
-        # Read image
         num = f"00{n}"
+        if out_of_core:
+            run_out_of_core(model, num, qc_dir)
+            continue
+
+        # Read image
         img_path = "path-to-compressed-block_num"
         img = "read-compressed-image"
 
-        output_path = os.path.join(mips_dir, f"input_{num}.png")
-        img_util.plot_mips(img, output_path=output_path)
-
         # Predict affinities
         affinities = inference.predict(
             img,
@@ -49,13 +55,20 @@ def main():
             trim=trim,
         )
 
-        output_path = os.path.join(mips_dir, f"affs_{num}.png")
-        img_util.plot_mips(affinities[0], output_path=output_path)
-
+        qc_input = init_input_qc(img.shape[-3:])
         img_path = f"{output_dir}/decompressed_{num}.tiff"
-        tifffile.imwrite(img_path, img.astype(np.uint16), compression="zlib")
+        write_tiff_by_slab(
+            img_path,
+            np.reshape(img, img.shape[-3:]),
+            chunk_shape[0],
+            shape=img.shape,
+            accumulators=[qc_input],
+        )
         del img
 
+        # Affinities are not written, so their QC needs a separate pass
+        qc_affs = compute_qc(init_affinities_qc, affinities[0])
+
         # Generate segmentation
         segmentation = inference.affinities_to_segmentation(
             affinities,
@@ -64,20 +77,219 @@ def main():
         )
         del affinities
 
-        output_path = os.path.join(mips_dir, f"segmentation_{num}.png")
-        img_util.plot_segmentation_mips(segmentation, output_path=output_path)
-
         # Save results
         zipped_swcs_path = f"{output_dir}/skeletons_{num}.zip"
         inference.segmentation_to_zipped_swcs(segmentation, zipped_swcs_path)
 
+        qc_segmentation = init_segmentation_qc(segmentation.shape)
         segmentation_path = f"{output_dir}/segmentation_{num}.tiff"
-        tifffile.imwrite(
+        write_tiff_by_slab(
             segmentation_path,
-            segmentation.astype(np.uint16),
-            compression="zlib",
+            segmentation,
+            chunk_shape[0],
+            accumulators=[qc_segmentation],
+        )
+
+        qc_path = os.path.join(qc_dir, f"qc_{num}.npz")
+        qc.save_qc(
+            qc_path,
+            {
+                "input": qc_input,
+                "affs": qc_affs,
+                "segmentation": qc_segmentation,
+            },
+        )
+        qc.plot_mips(qc_path, qc_dir, suffix=f"_{num}")
+
+
+def run_out_of_core(model, num, qc_dir):
+    """
+    Runs the segmentation pipeline on a single block, where the image is
+    read lazily chunk by chunk, affinities are predicted chunk by chunk and
+    written to a memory-mapped file, and TIFFs are written one z-slab at a
+    time. QC statistics are accumulated during these passes.
+
+    Note: only the image reads, the prediction, and the TIFF writes are
+    out-of-core. "inference.affinities_to_segmentation" runs on the whole
+    memory-mapped affinities and "inference.segmentation_to_zipped_swcs" on
+    the whole segmentation, so peak memory is still bounded by the size of
+    the block rather than the chunk shape.
+
+    Note: each padded chunk is normalized by "inference.predict" with its
+    own percentiles, and its patches are tiled from the start of the padded
+    chunk, so affinities may differ slightly from a full-volume prediction.
+    The halo and chunk shape are multiples of "patch_shape - overlap" so that
+    interior patches start at the same offsets as in a full-volume run.
+
+    Parameters
+    ----------
+    model : torch.nn.Module
+        Model used to predict affinities.
+    num : str
+        Unique identifier for an image block.
+    qc_dir : str
+        Directory that QC statistics are written to.
+    """
+
+    # Subroutines
+    def predict(chunk):
+        """
+        Predicts affinities for an image chunk.
+
+        Parameters
+        ----------
+        chunk : numpy.ndarray
+            Image chunk with shape (Z, Y, X).
+
+        Returns
+        -------
+        numpy.ndarray
+            Affinities with shape (C, Z, Y, X).
+        """
+        return inference.predict(
+            chunk,
+            model,
+            affinity_mode=affinity_mode,
+            batch_size=batch_size,
+            brightness_clip=300,
+            normalization_percentiles=(1, 99.9),
+            overlap=overlap,
+            patch_shape=patch_shape,
+            trim=trim,
         )
 
+    # Read image lazily
+    img_path = "path-to-compressed-block_num"
+    img = utils.open_zarr(img_path)[0, 0]
+
+    qc_input = init_input_qc(img.shape)
+    img_path = f"{output_dir}/decompressed_{num}.tiff"
+    write_tiff_by_slab(
+        img_path,
+        img,
+        chunk_shape[0],
+        shape=(1, 1) + tuple(img.shape),
+        accumulators=[qc_input],
+    )
+
+    # Predict affinities
+    qc_affs = init_affinities_qc(img.shape)
+    affinities_path = f"{output_dir}/affinities_{num}.npy"
+    affinities = predict_by_chunk(
+        img,
+        predict,
+        affinities_path,
+        chunk_shape=chunk_shape,
+        halo=halo,
+        accumulator=qc_affs,
+    )
+
+    # Generate segmentation
+    segmentation = inference.affinities_to_segmentation(
+        affinities,
+        agglomeration_thresholds=[0.6, 0.8, 0.9],
+        min_segment_size=100,
+    )
+    del affinities
+    os.remove(affinities_path)
+
+    # Save results
+    zipped_swcs_path = f"{output_dir}/skeletons_{num}.zip"
+    inference.segmentation_to_zipped_swcs(segmentation, zipped_swcs_path)
+
+    qc_segmentation = init_segmentation_qc(segmentation.shape)
+    segmentation_path = f"{output_dir}/segmentation_{num}.tiff"
+    write_tiff_by_slab(
+        segmentation_path,
+        segmentation,
+        chunk_shape[0],
+        accumulators=[qc_segmentation],
+    )
+
+    qc_path = os.path.join(qc_dir, f"qc_{num}.npz")
+    qc.save_qc(
+        qc_path,
+        {"input": qc_input, "affs": qc_affs, "segmentation": qc_segmentation},
+    )
+    qc.plot_mips(qc_path, qc_dir, suffix=f"_{num}")
+
+
+# --- QC Helpers ---
+def init_input_qc(shape):
+    """
+    Initializes the QC statistics of an input image.
+
+    Parameters
+    ----------
+    shape : Tuple[int]
+        Shape of image.
+
+    Returns
+    -------
+    qc.QCAccumulator
+        Accumulator with a histogram over the uint16 intensity range.
+    """
+    return qc.QCAccumulator(shape, hist_range=(0, 2**16), n_bins=1024)
+
+
+def init_affinities_qc(shape):
+    """
+    Initializes the QC statistics of the first affinity channel.
+
+    Parameters
+    ----------
+    shape : Tuple[int]
+        Spatial shape of affinities.
+
+    Returns
+    -------
+    qc.QCAccumulator
+        Accumulator with a histogram over the range [0, 1].
+    """
+    return qc.QCAccumulator(shape, hist_range=(0, 1), n_bins=100)
+
+
+def init_segmentation_qc(shape):
+    """
+    Initializes the QC statistics of a segmentation.
+
+    Parameters
+    ----------
+    shape : Tuple[int]
+        Shape of segmentation.
+
+    Returns
+    -------
+    qc.QCAccumulator
+        Accumulator with per-label voxel counts.
+    """
+    return qc.QCAccumulator(shape, labels=True)
+
+
+def compute_qc(init_qc, img):
+    """
+    Computes the QC statistics of an image that is already in memory and is
+    not written to disk, where leading singleton dimensions are removed.
+
+    Parameters
+    ----------
+    init_qc : callable
+        Function that takes the shape of an image and returns a
+        qc.QCAccumulator, such as "init_input_qc".
+    img : numpy.ndarray
+        Image with shape (Z, Y, X), optionally with leading singleton
+        dimensions.
+
+    Returns
+    -------
+    qc.QCAccumulator
+        Accumulator updated with the whole image.
+    """
+    img = np.reshape(img, img.shape[-3:])
+    accumulator = init_qc(img.shape)
+    accumulator.update_by_slab(img, slab_depth=chunk_shape[0])
+    return accumulator
+
 
 if __name__ == "__main__":
     # Parameters
@@ -88,6 +300,11 @@ if __name__ == "__main__":
     patch_shape = (96, 96, 96)
     trim = 8
 
+    # Out-of-core parameters (multiples of patch_shape - overlap)
+    out_of_core = False
+    chunk_shape = (256, 512, 512)
+    halo = (64, 64, 64)
+
     # Paths
     model_name = "UNet3d-20251019-643-0.6649"
     model_path = (
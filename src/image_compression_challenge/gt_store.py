@@ -0,0 +1,155 @@
+"""
+Local store of ground truth skeletons. The SWC files of each block are
+fetched once and saved byte for byte under a versioned cache directory, so
+that scoring does not refetch the same SWC files for every submission. The
+files are still parsed on each evaluation, since "evaluate" only accepts a
+path to SWC files.
+
+"""
+
+import hashlib
+import os
+import shutil
+
+from image_compression_challenge import utils
+
+GT_ROOT = "s3://aind-benchmark-data/3d-image-compression/swcs"
+CACHE_ROOT = os.path.join(
+    os.path.expanduser("~"), ".cache", "image_compression_challenge"
+)
+CACHE_VERSION = "v3"
+
+
+# --- Paths ---
+def get_cache_dir(gt_root=None, cache_root=None):
+    """
+    Gets the cache directory for ground truth skeletons read from "gt_root".
+
+    Parameters
+    ----------
+    gt_root : str, optional
+        Directory containing one subdirectory of SWC files per block. Default
+        is None, which means that GT_ROOT is used.
+    cache_root : str, optional
+        Root directory of the local cache. Default is None, which means that
+        CACHE_ROOT is used.
+
+    Returns
+    -------
+    str
+        Cache directory, which is specific to the cache version and to the
+        ground truth root.
+    """
+    gt_root = (gt_root or GT_ROOT).rstrip("/")
+    cache_root = cache_root or CACHE_ROOT
+    gt_hash = hashlib.sha1(gt_root.encode()).hexdigest()[:12]
+    return os.path.join(cache_root, "gt", CACHE_VERSION, gt_hash)
+
+
+def get_block_path(num, gt_root=None, cache_root=None):
+    """
+    Gets the path to the cached SWC files of the given block.
+
+    Parameters
+    ----------
+    num : str
+        Unique identifier for an image block.
+    gt_root : str, optional
+        Directory containing one subdirectory of SWC files per block. Default
+        is None, which means that GT_ROOT is used.
+    cache_root : str, optional
+        Root directory of the local cache. Default is None, which means that
+        CACHE_ROOT is used.
+
+    Returns
+    -------
+    str
+        Local directory containing the cached SWC files.
+    """
+    cache_dir = get_cache_dir(gt_root, cache_root)
+    return os.path.join(cache_dir, f"block_{num}")
+
+
+# --- Build ---
+def build_block(num, gt_root=None, cache_root=None):
+    """
+    Reads the SWC files of the given block and writes them unchanged to the
+    local cache. Files are written to a temporary directory that is renamed
+    once complete, so that concurrent builds never expose a partial block
+    and a failed build is never cached.
+
+    Parameters
+    ----------
+    num : str
+        Unique identifier for an image block.
+    gt_root : str, optional
+        Directory containing one subdirectory of SWC files per block. Default
+        is None, which means that GT_ROOT is used.
+    cache_root : str, optional
+        Root directory of the local cache. Default is None, which means that
+        CACHE_ROOT is used.
+
+    Returns
+    -------
+    str
+        Local directory containing the cached SWC files.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the block does not contain any SWC files.
+    """
+    # Read SWC files
+    block_root = f"{(gt_root or GT_ROOT).rstrip('/')}/block_{num}/"
+    keys = [k for k in utils.list_kvstore(block_root) if k.endswith(".swc")]
+    if not keys:
+        raise FileNotFoundError(f"No SWC files found in {block_root}")
+    contents = utils.read_kvstore(block_root, keys)
+
+    # Write SWC files
+    path = get_block_path(num, gt_root, cache_root)
+    tmp_dir = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    try:
+        for key, content in zip(keys, contents):
+            filename = os.path.join(tmp_dir, os.path.basename(key))
+            with open(filename, "wb") as f:
+                f.write(content)
+    except BaseException:
+        shutil.rmtree(tmp_dir)
+        raise
+
+    # Move block into cache
+    try:
+        os.rename(tmp_dir, path)
+    except OSError:
+        shutil.rmtree(tmp_dir)
+    return path
+
+
+# --- Load ---
+def get_gt_path(num, gt_root=None, cache_root=None):
+    """
+    Gets a local directory of SWC files for the given block, which is cached
+    first if needed.
+
+    Parameters
+    ----------
+    num : str
+        Unique identifier for an image block.
+    gt_root : str, optional
+        Directory containing one subdirectory of SWC files per block. Default
+        is None, which means that GT_ROOT is used.
+    cache_root : str, optional
+        Root directory of the local cache. Default is None, which means that
+        CACHE_ROOT is used.
+
+    Returns
+    -------
+    str
+        Local directory containing the SWC files of the given block.
+    """
+    path = get_block_path(num, gt_root, cache_root)
+    if not os.path.exists(path):
+        build_block(num, gt_root, cache_root)
+    return path
@@ -0,0 +1,268 @@
+"""
+Code that verifies that a compressed image in a submission decodes to the
+decompressed image that was submitted alongside it.
+
+"""
+
+import itertools
+import json
+import numpy as np
+import os
+import tensorstore as ts
+import tifffile
+import zipfile
+
+from image_compression_challenge import utils
+
+ZARR_METADATA = {".zarray": "zarr", "zarr.json": "zarr3"}
+
+
+def verify_compressed_block(zip_path, num):
+    """
+    Verifies that "compressed_{num}" decodes to "decompressed_{num}.tiff".
+    The compressed image is read directly from the ZIP archive one z-slab of
+    chunks at a time, where the chunks within a slab are decoded in parallel
+    and compared against the same region of the decompressed image. The
+    comparison stops at the first mismatching chunk.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
+    num : str
+        Unique identifier for an image block.
+
+    Returns
+    -------
+    status : str
+        Either "ok", "mismatch", or "unsupported" if the compressed image is
+        not stored in a format or with a codec that can be read, or if the
+        decompressed image cannot be read one z-slab at a time.
+    message : str
+        Description of the result.
+    """
+    # Find images
+    compressed_name = f"compressed_{num}"
+    arrays = find_zipped_zarr_arrays(zip_path, compressed_name)
+    if not arrays:
+        path = utils.find_compressed_path(zip_path, compressed_name)
+        return "unsupported", f"No reader for format of {path}"
+    decompressed_path = utils.find_decompressed_path(
+        zip_path, f"decompressed_{num}.tiff"
+    )
+
+    # Compare images
+    with zipfile.ZipFile(zip_path, "r") as z:
+        with z.open(decompressed_path) as f, tifffile.TiffFile(f) as tiff:
+            shape = squeeze_shape(tiff.series[0].shape)
+            for array_path, driver in arrays:
+                args = utils.get_zipped_tensorstore_args(
+                    zip_path, array_path, driver=driver
+                )
+                try:
+                    img = ts.open(args, read=True).result()
+                except ValueError as e:
+                    return "unsupported", f"Unable to open {array_path}: {e}"
+
+                img = squeeze_tensorstore(img)
+                if tuple(img.shape) == shape:
+                    return compare_by_chunk(img, tiff, array_path)
+    return "mismatch", f"No array in {compressed_name} has shape {shape}"
+
+
+def compare_by_chunk(img, tiff, array_path):
+    """
+    Compares a compressed image against a decompressed TIFF image chunk by
+    chunk. The TIFF image must store one page per z-slice, so that each slab
+    can be read without reading the whole image into memory.
+
+    Parameters
+    ----------
+    img : tensorstore.TensorStore
+        Compressed image with shape (Z, Y, X).
+    tiff : tifffile.TiffFile
+        Decompressed image with the same shape as "img".
+    array_path : str
+        Path of the compressed image within the ZIP archive.
+
+    Returns
+    -------
+    status : str
+        Either "ok", "mismatch", or "unsupported" if a chunk of the
+        compressed image cannot be decoded or the TIFF image does not store
+        one page per z-slice.
+    message : str
+        Description of the result.
+    """
+    if not is_paged_by_slice(tiff):
+        msg = "Decompressed image must store one TIFF page per z-slice"
+        return "unsupported", msg
+
+    chunk_shape = img.chunk_layout.read_chunk.shape[-3:]
+    depth = chunk_shape[0]
+    for z0 in range(0, img.shape[0], depth):
+        # Read decompressed slab
+        z1 = min(z0 + depth, img.shape[0])
+        slab = read_tiff_slab(tiff, z0, z1)
+
+        # Decode compressed chunks in parallel
+        pending = list()
+        for y0, x0 in itertools.product(
+            range(0, img.shape[1], chunk_shape[1]),
+            range(0, img.shape[2], chunk_shape[2]),
+        ):
+            y1 = min(y0 + chunk_shape[1], img.shape[1])
+            x1 = min(x0 + chunk_shape[2], img.shape[2])
+            region = (slice(z0, z1), slice(y0, y1), slice(x0, x1))
+            pending.append((region, img[region].read()))
+
+        # Compare chunks
+        for region, future in pending:
+            start = tuple(int(s.start) for s in region)
+            try:
+                chunk = future.result()
+            except ValueError as e:
+                _cancel(pending)
+                msg = f"Unable to decode {array_path} at {start}: {e}"
+                return "unsupported", msg
+
+            if not np.array_equal(chunk, slab[(slice(None),) + region[1:]]):
+                _cancel(pending)
+                msg = f"{array_path} differs at chunk starting at {start}"
+                return "mismatch", msg
+    return "ok", f"{array_path} matches decompressed image"
+
+
+# --- Helpers ---
+def find_zipped_zarr_arrays(zip_path, filename):
+    """
+    Finds the zarr arrays stored under the given compressed image in a ZIP
+    archive.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
+    filename : str
+        Name of compressed file.
+
+    Returns
+    -------
+    List[Tuple[str, str]]
+        Path of each zarr array in the ZIP archive and the tensorstore driver
+        used to read it, sorted so that arrays closest to the root come
+        first.
+    """
+    arrays = list()
+    with zipfile.ZipFile(zip_path, "r") as z:
+        for name in z.namelist():
+            # Check whether file is array metadata
+            dirname, basename = os.path.split(name)
+            in_image = any(
+                filename in part and "decompressed" not in part
+                for part in dirname.split("/")
+            )
+            if not in_image or basename not in ZARR_METADATA:
+                continue
+
+            # Skip zarr v3 groups
+            if basename == "zarr.json":
+                metadata = json.loads(z.read(name))
+                if metadata.get("node_type") != "array":
+                    continue
+            arrays.append((dirname, ZARR_METADATA[basename]))
+    return sorted(arrays, key=lambda a: (a[0].count("/"), a[0]))
+
+
+def is_paged_by_slice(tiff):
+    """
+    Checks whether a TIFF image stores each z-slice as a separate page.
+
+    Parameters
+    ----------
+    tiff : tifffile.TiffFile
+        TIFF image with shape (Z, Y, X) after removing singleton dimensions.
+
+    Returns
+    -------
+    bool
+        Indication of whether each z-slice is a separate page.
+    """
+    shape = squeeze_shape(tiff.series[0].shape)
+    return len(shape) == 3 and len(tiff.series[0].pages) == shape[0]
+
+
+def read_tiff_slab(tiff, z0, z1):
+    """
+    Reads the slices z0 through z1 of a TIFF image, where each slice is
+    stored as a separate page.
+
+    Parameters
+    ----------
+    tiff : tifffile.TiffFile
+        TIFF image with shape (Z, Y, X) after removing singleton dimensions.
+    z0 : int
+        Index of first slice to be read.
+    z1 : int
+        Index of last slice to be read (exclusive).
+
+    Returns
+    -------
+    numpy.ndarray
+        Slices of the TIFF image with shape (z1 - z0, Y, X).
+    """
+    shape = squeeze_shape(tiff.series[0].shape)
+    slab = tiff.asarray(key=range(z0, z1), series=0)
+    return slab.reshape((z1 - z0,) + shape[1:])
+
+
+def squeeze_shape(shape):
+    """
+    Removes the leading singleton dimensions of an image shape.
+
+    Parameters
+    ----------
+    shape : Tuple[int]
+        Shape of an image.
+
+    Returns
+    -------
+    Tuple[int]
+        Shape of the image without leading singleton dimensions.
+    """
+    shape = tuple(shape)
+    while len(shape) > 3 and shape[0] == 1:
+        shape = shape[1:]
+    return shape
+
+
+def squeeze_tensorstore(img):
+    """
+    Removes the leading singleton dimensions of a tensorstore image.
+
+    Parameters
+    ----------
+    img : tensorstore.TensorStore
+        Image to be squeezed.
+
+    Returns
+    -------
+    tensorstore.TensorStore
+        Image without leading singleton dimensions.
+    """
+    while img.rank > 3 and img.shape[0] == 1:
+        img = img[0]
+    return img
+
+
+def _cancel(pending):
+    """
+    Cancels the reads of chunks that have not finished.
+
+    Parameters
+    ----------
+    pending : List[Tuple[Tuple[slice], tensorstore.Future]]
+        Region and read future of each chunk.
+    """
+    for _, future in pending:
+        future.cancel()
@@ -0,0 +1,167 @@
+"""
+Prefetcher that starts reading the reference data needed to score a
+submission (i.e. original images and ground truth skeletons) as soon as
+scoring begins, so that I/O overlaps with the checks that run before the
+data is needed.
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import threading
+
+from image_compression_challenge import gt_store, utils
+
+
+class Prefetcher:
+    """
+    Class that reads the original image and ground truth skeletons of each
+    block in background threads. Consumers get a future for each item and
+    only block if it has not been read yet. Only a few original images are
+    read ahead of the consumer, since each one is large.
+
+    Note: the next original image starts being read as soon as one is
+    consumed, so up to "read_ahead + 1" original images are in memory while
+    the consumer still holds the latest one.
+
+    """
+
+    def __init__(
+        self,
+        block_nums,
+        img_root,
+        gt_root=None,
+        cache_root=None,
+        tensorstore_context=None,
+        s3_endpoint=None,
+        read_ahead=2,
+        max_workers=4,
+    ):
+        """
+        Instantiates a Prefetcher object, then starts reading the ground
+        truth skeletons of every block and the first original images.
+
+        Parameters
+        ----------
+        block_nums : List[str]
+            Block numbers specifying what blocks to use in evaluation.
+        img_root : str
+            Directory containing one "block_{num}/input.zarr" per block,
+            either local or on S3.
+        gt_root : str, optional
+            Directory containing one subdirectory of ground truth SWC files
+            per block. Default is None, which means that gt_store.GT_ROOT is
+            used.
+        cache_root : str, optional
+            Root directory of the local cache of ground truth skeletons.
+            Default is None, which means that gt_store.CACHE_ROOT is used.
+        tensorstore_context : tensorstore.Context, optional
+            Tensorstore context used to read the original images.
+            Default is None.
+        s3_endpoint : str, optional
+            URL of an S3-compatible server to be used instead of AWS. Default
+            is None.
+        read_ahead : int, optional
+            Maximum number of original images that are read or held by the
+            prefetcher before being consumed with "get_original", which does
+            not count the image returned by the latest call. Default is 2.
+        max_workers : int, optional
+            Maximum number of threads. Default is 4.
+        """
+        # Instance attributes
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.img_root = img_root
+        self.tensorstore_context = tensorstore_context
+        self.s3_endpoint = s3_endpoint
+        self.stop_event = threading.Event()
+
+        # Start reading
+        self.originals = dict()
+        self.unread_nums = list(block_nums)
+        for _ in range(read_ahead):
+            self._read_next_original()
+
+        self.gt_paths = dict()
+        for num in block_nums:
+            self.gt_paths[num] = self.executor.submit(
+                gt_store.get_gt_path, num, gt_root, cache_root
+            )
+
+    def __enter__(self):
+        """
+        Enters the context manager.
+
+        Returns
+        -------
+        Prefetcher
+            This object.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Exits the context manager and stops reading, see "shutdown".
+        """
+        self.shutdown()
+
+    def get_original(self, num):
+        """
+        Gets the future of the original image of a block, which is
+        downsampled by a factor of 2 along each axis, then starts reading the
+        next original image. The future is removed from the prefetcher, so
+        that the image is freed once consumed.
+
+        Parameters
+        ----------
+        num : str
+            Unique identifier for an image block.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future whose result is the downsampled original image.
+        """
+        while num not in self.originals and self.unread_nums:
+            self._read_next_original()
+        future = self.originals.pop(num)
+        self._read_next_original()
+        return future
+
+    def _read_next_original(self):
+        """
+        Starts reading the next original image that has not been read.
+        """
+        if self.unread_nums:
+            num = self.unread_nums.pop(0)
+            self.originals[num] = self.executor.submit(
+                utils.read_zarr_downsampled_2x,
+                f"{self.img_root}/block_{num}/input.zarr/0",
+                context=self.tensorstore_context,
+                s3_endpoint=self.s3_endpoint,
+                stop_event=self.stop_event,
+            )
+
+    def get_gt_path(self, num):
+        """
+        Gets the local directory of ground truth SWC files of a block, which
+        blocks until the files have been cached.
+
+        Parameters
+        ----------
+        num : str
+            Unique identifier for an image block.
+
+        Returns
+        -------
+        str
+            Local directory containing the SWC files of the given block.
+        """
+        return self.gt_paths[num].result()
+
+    def shutdown(self):
+        """
+        Cancels reads that have not started, stops reads of original images
+        before their next slab, and releases the threads.
+        """
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
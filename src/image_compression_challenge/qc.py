@@ -0,0 +1,235 @@
+"""
+Streaming accumulation of quality control (QC) statistics of an image, which
+are updated chunk by chunk. Images that do not fit in memory are accumulated
+during a pass that already reads or writes them, while images in memory are
+accumulated one z-slab at a time. The MIPs can be plotted from the saved
+statistics with "plot_mips".
+
+"""
+
+from matplotlib.figure import Figure
+
+import numpy as np
+import os
+
+
+class QCAccumulator:
+    """
+    Class that accumulates the maximum intensity projections (MIPs) along
+    each axis, an intensity histogram, and optionally per-label voxel counts
+    of an image with shape (Z, Y, X).
+
+    """
+
+    def __init__(self, shape, hist_range=None, n_bins=256, labels=False):
+        """
+        Instantiates a QCAccumulator object.
+
+        Parameters
+        ----------
+        shape : Tuple[int]
+            Shape of image.
+        hist_range : Tuple[float], optional
+            Lower and upper bounds of the intensity histogram, where values
+            outside of this range are not counted. Default is None, which
+            means that no histogram is computed.
+        n_bins : int, optional
+            Number of bins in the intensity histogram. Default is 256.
+        labels : bool, optional
+            Indication of whether the image is a segmentation, in which case
+            the number of voxels of each label is counted. Default is False.
+        """
+        self.shape = tuple(shape)
+        self.mips = None
+        self.hist_edges = None
+        self.hist_counts = None
+        if hist_range is not None:
+            self.hist_edges = np.linspace(*hist_range, n_bins + 1)
+            self.hist_counts = np.zeros(n_bins, dtype=np.int64)
+        self.label_counts = dict() if labels else None
+
+    def update(self, chunk, region):
+        """
+        Updates the statistics with a chunk of the image.
+
+        Parameters
+        ----------
+        chunk : numpy.ndarray
+            Chunk of the image.
+        region : Tuple[slice]
+            Region of the image covered by the chunk, where missing trailing
+            axes are assumed to cover the whole image.
+        """
+        # Initialize MIPs
+        region = tuple(region) + (slice(None),) * (3 - len(region))
+        if self.mips is None:
+            fill = _min_value(chunk.dtype)
+            self.mips = [
+                np.full(_drop(self.shape, axis), fill, dtype=chunk.dtype)
+                for axis in range(3)
+            ]
+
+        # Update MIPs
+        for axis in range(3):
+            idx = _drop(region, axis)
+            self.mips[axis][idx] = np.maximum(
+                self.mips[axis][idx], chunk.max(axis=axis)
+            )
+
+        # Update histogram
+        if self.hist_counts is not None:
+            self.hist_counts += np.histogram(chunk, bins=self.hist_edges)[0]
+
+        # Update label counts
+        if self.label_counts is not None:
+            labels, counts = np.unique(chunk, return_counts=True)
+            for label, count in zip(labels.tolist(), counts.tolist()):
+                self.label_counts[label] = (
+                    self.label_counts.get(label, 0) + count
+                )
+
+    def update_by_slab(self, img, slab_depth):
+        """
+        Updates the statistics with an entire image one z-slab at a time.
+
+        Parameters
+        ----------
+        img : numpy.ndarray
+            Image with shape (Z, Y, X).
+        slab_depth : int
+            Number of z-slices per slab.
+        """
+        for z0 in range(0, img.shape[0], slab_depth):
+            z1 = min(z0 + slab_depth, img.shape[0])
+            self.update(np.asarray(img[z0:z1]), (slice(z0, z1),))
+
+    def to_dict(self, prefix=""):
+        """
+        Gets the accumulated statistics.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Prefix added to each key. Default is an empty string.
+
+        Returns
+        -------
+        dict
+            Dictionary that maps names of statistics to arrays, where the
+            MIPs along the z, y, and x axes are stored under "mip_yx",
+            "mip_zx", and "mip_zy".
+        """
+        stats = dict()
+        if self.mips is not None:
+            for name, mip in zip(["mip_yx", "mip_zx", "mip_zy"], self.mips):
+                stats[prefix + name] = mip
+        if self.hist_counts is not None:
+            stats[prefix + "hist_edges"] = self.hist_edges
+            stats[prefix + "hist_counts"] = self.hist_counts
+        if self.label_counts is not None:
+            labels = sorted(self.label_counts)
+            counts = [self.label_counts[label] for label in labels]
+            stats[prefix + "labels"] = np.array(labels)
+            stats[prefix + "label_counts"] = np.array(counts, dtype=np.int64)
+        return stats
+
+
+def save_qc(path, accumulators):
+    """
+    Saves the statistics of several images as a single NPZ file.
+
+    Parameters
+    ----------
+    path : str
+        Path that NPZ file is written to.
+    accumulators : dict
+        Dictionary that maps image names (e.g. "input") to QCAccumulator
+        objects, where each image name is used as a key prefix.
+    """
+    stats = dict()
+    for name, accumulator in accumulators.items():
+        stats.update(accumulator.to_dict(prefix=f"{name}_"))
+    np.savez_compressed(path, **stats)
+
+
+def plot_mips(path, output_dir, suffix=""):
+    """
+    Plots the MIPs of each image stored in a QC file, where the MIPs along
+    the z, y, and x axes of an image are saved side by side as a PNG file.
+
+    Parameters
+    ----------
+    path : str
+        Path to NPZ file written by "save_qc".
+    output_dir : str
+        Directory that PNG files are written to.
+    suffix : str, optional
+        Suffix added to the name of each PNG file (e.g. "_005"). Default is
+        an empty string.
+
+    Returns
+    -------
+    List[str]
+        Paths of the PNG files.
+    """
+    output_paths = list()
+    with np.load(path) as npz:
+        suffix_len = len("_mip_yx")
+        names = [k[:-suffix_len] for k in npz.files if k.endswith("_mip_yx")]
+        for name in names:
+            # Plot MIPs
+            is_labels = f"{name}_labels" in npz.files
+            fig = Figure(figsize=(15, 5))
+            axes = fig.subplots(1, 3)
+            for ax, mip_name in zip(axes, ["mip_yx", "mip_zx", "mip_zy"]):
+                mip = npz[f"{name}_{mip_name}"]
+                ax.imshow(mip, cmap="nipy_spectral" if is_labels else "gray")
+                ax.set_title(mip_name)
+                ax.axis("off")
+
+            # Save plot
+            output_path = os.path.join(output_dir, f"{name}{suffix}.png")
+            fig.savefig(output_path, bbox_inches="tight")
+            output_paths.append(output_path)
+    return output_paths
+
+
+# --- Helpers ---
+def _drop(values, axis):
+    """
+    Removes the element at the given axis.
+
+    Parameters
+    ----------
+    values : tuple
+        Values with one element per axis.
+    axis : int
+        Axis to be removed.
+
+    Returns
+    -------
+    tuple
+        Values without the element at the given axis.
+    """
+    return tuple(v for i, v in enumerate(values) if i != axis)
+
+
+def _min_value(dtype):
+    """
+    Gets the smallest value that can be represented by a data type.
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        Data type.
+
+    Returns
+    -------
+    int or float
+        Smallest value of the data type.
+    """
+    if np.issubdtype(dtype, np.integer):
+        return np.iinfo(dtype).min
+    elif np.issubdtype(dtype, np.bool_):
+        return False
+    return -np.inf
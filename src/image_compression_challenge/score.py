@@ -8,25 +8,50 @@ Code that scores submissions to the image compression data challenge.
 
 """
 
-from concurrent.futures import as_completed, ProcessPoolExecutor
-from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache, partial
 from segmentation_skeleton_metrics.evaluate import evaluate
 from segmentation_skeleton_metrics.utils.img_util import TiffImage
 from segmentation_skeleton_metrics.utils.util import compute_weighted_avg
 from tqdm import tqdm
 
+import argparse
 import numpy as np
+import os
 import pandas as pd
+import tempfile
+import time
 import zipfile
 
-from image_compression_challenge import utils
+from image_compression_challenge import (
+    baseline_index,
+    gt_store,
+    integrity,
+    prefetch,
+    utils,
+    work_queue,
+)
+from image_compression_challenge.baseline_index import fill_nan_results
 
 VALIDATE_NUMS = ["000", "001", "002", "003", "004"]
 TEST_NUMS = ["005", "006", "007", "008", "009"]
 ERROR_TOLS = {"% Omit Edges": 10, "Split Rate": 1000, "Merge Rate": 1000}
-
-
-def score(zip_path, running_on_coda=False, use_test_blocks=True):
+IMG_ROOT = "s3://aind-benchmark-data/3d-image-compression/blocks"
+CHECK_NAMES = [
+    "check_compressed_integrity",
+    "check_ssim",
+    "check_segmentation_consistency",
+    "compute_compressed_size",
+]
+
+
+def score(
+    zip_path,
+    running_on_coda=False,
+    use_test_blocks=True,
+    gt_root=None,
+    tensorstore_context=None,
+):
     """
     Evaluates a compressed submission file by validating its contents and
     computing its compression score.
@@ -41,15 +66,35 @@ def score(zip_path, running_on_coda=False, use_test_blocks=True):
     use_test_blocks : bool, optional
         Indication of whether to run evaluation using test blocks. Otherwise,
         the validation blocks are used. Default is True.
+    gt_root : str, optional
+        Directory containing one subdirectory of ground truth SWC files per
+        block, which can be a local directory for scoring offline. Default is
+        None, which means that gt_store.GT_ROOT is used.
+    tensorstore_context : tensorstore.Context, optional
+        Tensorstore context used to read the original images, see
+        "utils.get_tensorstore_context". Default is None.
     """
     # Set block IDs
     block_nums = TEST_NUMS if use_test_blocks else VALIDATE_NUMS
+    if tensorstore_context is None:
+        tensorstore_context = get_default_tensorstore_context()
 
-    # Check submission is valid
+    # Check submission is valid while reference data is prefetched
     print("\nStep 1: Check Submission")
-    check_required_submission_files(zip_path, block_nums)
-    check_ssim(zip_path, block_nums, running_on_coda)
-    check_segmentation_consistency(zip_path, block_nums)
+    with prefetch.Prefetcher(
+        block_nums,
+        IMG_ROOT,
+        gt_root=gt_root,
+        tensorstore_context=tensorstore_context,
+    ) as prefetcher:
+        check_required_submission_files(zip_path, block_nums)
+        check_compressed_integrity(zip_path, block_nums)
+        check_ssim(
+            zip_path, block_nums, running_on_coda, prefetcher=prefetcher
+        )
+        check_segmentation_consistency(
+            zip_path, block_nums, prefetcher=prefetcher
+        )
 
     # Score submission
     print("\nStep 2: Score Submission")
@@ -92,7 +137,33 @@ def check_required_submission_files(zip_path, block_nums):
         check_file(f"skeletons_{num}.zip")
 
 
-def check_ssim(zip_path, block_nums, running_on_coda):
+def check_compressed_integrity(zip_path, block_nums):
+    """
+    Checks that each compressed image decodes to the decompressed image that
+    was submitted with it. Compressed images stored in a format or with a
+    codec without a reader are reported as unverified.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
+    block_nums : List[str]
+        Block numbers specifying what blocks to use in evaluation.
+    """
+    for num in tqdm(block_nums, desc="Checking Compressed Integrity"):
+        status, msg = integrity.verify_compressed_block(zip_path, num)
+        assert status != "mismatch", f"Failed on block {num}: {msg}"
+        if status == "unsupported":
+            print(f"Warning: block {num} was not verified. {msg}")
+
+
+def check_ssim(
+    zip_path,
+    block_nums,
+    running_on_coda,
+    tensorstore_context=None,
+    prefetcher=None,
+):
     """
     Checks the decompressed image quality for all benchmark blocks by
     computing the Structural Similarity Index (SSIM) between decompressed
@@ -107,43 +178,76 @@ def check_ssim(zip_path, block_nums, running_on_coda):
     running_on_coda : bool
         Indication of whether the code is being run on Coda. Default is
         False.
+    tensorstore_context : tensorstore.Context, optional
+        Tensorstore context used to read the original images if no
+        prefetcher is provided. Default is None.
+    prefetcher : prefetch.Prefetcher, optional
+        Prefetcher that is already reading the original images. Default is
+        None, which means that a prefetcher is started here.
     """
-    # Set root path to original images
-    img_root = "s3://aind-benchmark-data/3d-image-compression/blocks"
+    # Start reading original images
+    if prefetcher is None:
+        if tensorstore_context is None:
+            tensorstore_context = get_default_tensorstore_context()
+        with prefetch.Prefetcher(
+            block_nums, IMG_ROOT, tensorstore_context=tensorstore_context
+        ) as prefetcher:
+            check_ssim(
+                zip_path, block_nums, running_on_coda, prefetcher=prefetcher
+            )
+        return
 
     # Compute SSIM
-    with ProcessPoolExecutor(max_workers=2) as executor:
-        # Assign processes
+    pbar = tqdm(total=len(block_nums), desc="Checking SSIM")
+    with ThreadPoolExecutor(max_workers=2) as executor:
         pending = dict()
         for num in block_nums:
-            # Set paths
-            decompressed_filename = f"decompressed_{num}.tiff"
-            original_path = f"{img_root}/block_{num}/input.zarr/0"
+            # Wait for a thread to become available
+            if len(pending) >= 2:
+                done = wait(pending, return_when=FIRST_COMPLETED).done
+                _check_ssim_results(done, pending, pbar)
 
-            # Submit thread
+            # Assign thread once original image is read
+            original = prefetcher.get_original(num).result()
             thread = executor.submit(
-                _compute_ssim, original_path, zip_path, decompressed_filename
+                _compute_ssim, original, zip_path, f"decompressed_{num}.tiff"
             )
             pending[thread] = num
+            del original
+        _check_ssim_results(list(pending), pending, pbar)
+
+
+def _check_ssim_results(threads, pending, pbar):
+    """
+    Checks the SSIM computed by finished threads.
 
-        # Process results
-        pbar = tqdm(total=len(block_nums), desc="Checking SSIM")
-        for thread in as_completed(pending.keys()):
-            num = pending.pop(thread)
-            ssim = thread.result()
-            assert ssim > 0.9, f"Failed with SSIM={ssim} on block {num}"
-            pbar.update(1)
+    Parameters
+    ----------
+    threads : List[concurrent.futures.Future]
+        Finished threads.
+    pending : dict
+        Dictionary that maps threads to block numbers, where finished
+        threads are removed.
+    pbar : tqdm.tqdm
+        Progress bar that is updated for each finished thread.
+    """
+    for thread in threads:
+        num = pending.pop(thread)
+        ssim = thread.result()
+        assert ssim > 0.9, f"Failed with SSIM={ssim} on block {num}"
+        pbar.update(1)
 
 
-def _compute_ssim(original_path, zip_path, decompressed_filename):
+def _compute_ssim(original, zip_path, decompressed_filename):
     """
     Computes the Structural Similarity Index (SSIM) between an image and its
     decompressed counterpart stored in a ZIP archive.
 
     Parameters
     ----------
-    original_path : str
-        Path to the original Zarr dataset containing the reference image.
+    original : numpy.ndarray
+        Original image downsampled by a factor of 2 along each axis, see
+        "utils.read_zarr_downsampled_2x".
     zip_path : str
         Path to the ZIP archive containing the decompressed TIFF image.
     decompressed_filename : str
@@ -155,20 +259,18 @@ def _compute_ssim(original_path, zip_path, decompressed_filename):
         Computed SSIM value between the decompressed and original images,
         where values close to 1 indicate high similarity.
     """
-    # Read images
+    # Read and downsample decompressed image
     decompressed = utils.read_zipped_tiff(zip_path, decompressed_filename)
-    original = utils.read_zarr(original_path)
-
-    # Downsample images
     decompressed = utils.downsample_mean_2x(decompressed[0, 0])
-    original = utils.downsample_mean_2x(original[0, 0])
 
     # Compute metric
     ssim = utils.compute_ssim(decompressed, original)
     return ssim
 
 
-def check_segmentation_consistency(zip_path, block_nums):
+def check_segmentation_consistency(
+    zip_path, block_nums, gt_root=None, prefetcher=None
+):
     """
     Checks segmentation results against baseline metrics to ensure
     consistency.
@@ -179,23 +281,77 @@ def check_segmentation_consistency(zip_path, block_nums):
         Path to a participant's submitted ZIP archive.
     block_nums : List[str]
         Block numbers specifying what blocks to use in evaluation.
+    gt_root : str, optional
+        Directory containing one subdirectory of ground truth SWC files per
+        block. Default is None, which means that gt_store.GT_ROOT is used.
+    prefetcher : prefetch.Prefetcher, optional
+        Prefetcher that is already caching the ground truth skeletons, in
+        which case "gt_root" is ignored. Default is None.
     """
     move_skeleton_zips(zip_path, block_nums)
     for num in tqdm(block_nums, desc="Checking Segmentation"):
-        # Load segmentation results
-        result_submission = compute_segmentation_metrics(zip_path, num)
-        result_baseline = load_baseline_segmentation_result(num)
-
-        # Compare segmentation results
-        for metric in ERROR_TOLS:
-            avg_baseline = compute_weighted_avg(result_baseline, metric)
-            avg_sumission = compute_weighted_avg(result_submission, metric)
-            error = avg_sumission - avg_baseline
-            if error > ERROR_TOLS[metric] and error:
-                raise ValueError(f"Failed with {metric}={error}")
+        if prefetcher is None:
+            gt_path = gt_store.get_gt_path(num, gt_root=gt_root)
+        else:
+            gt_path = prefetcher.get_gt_path(num)
+        errors = compute_segmentation_errors(zip_path, num, gt_path)
+        check_segmentation_errors(errors)
     utils.rmdir("./temp")
 
 
+def compute_segmentation_errors(zip_path, num, gt_path, temp_dir="./temp"):
+    """
+    Computes the difference between the skeleton-based metrics of the
+    submitted segmentation and the baseline segmentation for a given block.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
+    num : str
+        Unique identifier for an image block.
+    gt_path : str
+        Local directory containing the ground truth SWC files of the block,
+        see "gt_store.get_gt_path".
+    temp_dir : str, optional
+        Directory containing the extracted skeleton ZIP archive of the block.
+        Default is "./temp".
+
+    Returns
+    -------
+    errors : dict
+        Dictionary that maps each metric in ERROR_TOLS to the difference
+        between the submitted and baseline weighted averages.
+    """
+    # Load segmentation results
+    result_submission = compute_segmentation_metrics(
+        zip_path, num, gt_path, temp_dir=temp_dir
+    )
+
+    # Compare segmentation results
+    errors = dict()
+    for metric in ERROR_TOLS:
+        avg_baseline = baseline_index.get_weighted_avg(num, metric)
+        avg_sumission = compute_weighted_avg(result_submission, metric)
+        errors[metric] = float(avg_sumission - avg_baseline)
+    return errors
+
+
+def check_segmentation_errors(errors):
+    """
+    Checks that the segmentation errors of a block are within ERROR_TOLS.
+
+    Parameters
+    ----------
+    errors : dict
+        Dictionary that maps each metric in ERROR_TOLS to the difference
+        between the submitted and baseline weighted averages.
+    """
+    for metric, error in errors.items():
+        if error > ERROR_TOLS[metric] and error:
+            raise ValueError(f"Failed with {metric}={error}")
+
+
 # --- Compute Score ---
 def compute_compressed_size(zip_path, block_nums):
     """
@@ -217,13 +373,7 @@ def compute_compressed_size(zip_path, block_nums):
     # Compute score
     compressed_size = list()
     for num in tqdm(block_nums, "Compute Compressed Size"):
-        # Find path to compressed image
-        name = f"compressed_{num}"
-        compressed_img_path = utils.find_compressed_path(zip_path, name)
-
-        # Compute compressed size
-        size_gb = get_file_size(zip_path, compressed_img_path)
-        compressed_size.append(size_gb)
+        compressed_size.append(get_compressed_size(zip_path, num))
 
     # Report score
     score = np.mean(compressed_size)
@@ -253,10 +403,9 @@ def get_file_size(zip_path, filename):
         return info.file_size / 1024**3
 
 
-# --- Helpers ---
-def compute_segmentation_metrics(zip_path, num):
+def get_compressed_size(zip_path, num):
     """
-    Computes skeleton-based segmentation metrics for a given image.
+    Gets the size (in GBs) of the compressed image of a given block.
 
     Parameters
     ----------
@@ -267,79 +416,316 @@ def compute_segmentation_metrics(zip_path, num):
 
     Returns
     -------
-    results : pandas.DataFrame
-        Data frame containing skeleton metric results.
+    float
+        Size of the compressed image.
     """
-    # Paths
-    gt_path = (
-        f"s3://aind-benchmark-data/3d-image-compression/swcs/block_{num}/"
+    name = f"compressed_{num}"
+    compressed_img_path = utils.find_compressed_path(zip_path, name)
+    return get_file_size(zip_path, compressed_img_path)
+
+
+# --- Distributed Scoring ---
+def score_distributed(
+    zip_path, db_path, use_test_blocks=True, poll_interval=10, timeout=21600
+):
+    """
+    Evaluates a submission by adding its (block, check) tasks to a work
+    queue shared by scoring nodes, then waiting for the workers started with
+    "run_scoring_worker" to finish them. If the file at "zip_path" has
+    changed since it was last scored, then its tasks are run again.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive, which must be readable
+        by every worker.
+    db_path : str
+        Path to SQLite database of the shared work queue.
+    use_test_blocks : bool, optional
+        Indication of whether to run evaluation using test blocks. Otherwise,
+        the validation blocks are used. Default is True.
+    poll_interval : float, optional
+        Number of seconds between checks of whether the tasks are finished.
+        Default is 10.
+    timeout : float, optional
+        Number of seconds to wait for the tasks to finish before raising a
+        TimeoutError. Default is 21600 (i.e. 6 hours).
+
+    Returns
+    -------
+    float
+        Average compressed file size (in GBs) across all blocks.
+    """
+    # Initializations
+    block_nums = TEST_NUMS if use_test_blocks else VALIDATE_NUMS
+    zip_path = os.path.abspath(zip_path)
+    queue = work_queue.TaskQueue(db_path)
+
+    # Submit tasks
+    print("\nStep 1: Check Submission")
+    check_required_submission_files(zip_path, block_nums)
+    queue.enqueue(
+        zip_path,
+        block_nums,
+        CHECK_NAMES,
+        version=work_queue.get_version(zip_path),
     )
-    segmentation_filename = f"segmentation_{num}.tiff"
-    skeletons_path = f"./temp/skeletons_{num}.zip"
-    output_dir = "./temp"
 
-    # Read segmentation
-    segmentation = TiffImage(zip_path, inner_tiff=segmentation_filename)
+    deadline = time.time() + timeout
+    while not queue.is_finished(zip_path):
+        if time.time() > deadline:
+            n_pending = sum(
+                t["status"] not in ("done", "failed")
+                for t in queue.get_tasks(zip_path)
+            )
+            raise TimeoutError(
+                f"{n_pending} tasks are unfinished after {timeout} seconds,"
+                " check that scoring workers are running"
+            )
+        time.sleep(poll_interval)
 
-    # Run evaluation
-    evaluate(
-        gt_path,
-        segmentation,
-        output_dir,
-        anisotropy=(0.748, 0.748, 1.0),
-        fragments_path=skeletons_path,
-        verbose=False,
+    # Score submission
+    print("\nStep 2: Score Submission")
+    return assemble_score(queue.get_tasks(zip_path), block_nums)
+
+
+def assemble_score(tasks, block_nums):
+    """
+    Checks the results of the finished tasks of a submission and computes
+    its compression score, where the checks match those run by "score".
+
+    Parameters
+    ----------
+    tasks : List[dict]
+        Finished tasks of a submission returned by "TaskQueue.get_tasks".
+    block_nums : List[str]
+        Block numbers specifying what blocks to use in evaluation.
+
+    Returns
+    -------
+    float
+        Average compressed file size (in GBs) across all blocks.
+    """
+    # Check for failed tasks
+    results = {(t["num"], t["check_name"]): t for t in tasks}
+    for num in block_nums:
+        for check_name in CHECK_NAMES:
+            task = results[(num, check_name)]
+            if task["status"] != "done":
+                msg = f"{check_name} failed on block {num}: {task['error']}"
+                raise RuntimeError(msg)
+
+    # Check results
+    compressed_size = list()
+    for num in block_nums:
+        status, msg = results[(num, "check_compressed_integrity")]["result"]
+        assert status != "mismatch", f"Failed on block {num}: {msg}"
+        if status == "unsupported":
+            print(f"Warning: block {num} was not verified. {msg}")
+
+        ssim = results[(num, "check_ssim")]["result"]
+        assert ssim > 0.9, f"Failed with SSIM={ssim} on block {num}"
+
+        check_segmentation_errors(
+            results[(num, "check_segmentation_consistency")]["result"]
+        )
+        compressed_size.append(
+            results[(num, "compute_compressed_size")]["result"]
+        )
+
+    # Report score
+    score = np.mean(compressed_size)
+    print(f"Score: {score} GBs")
+    return score
+
+
+def run_scoring_worker(
+    db_path,
+    gt_root=None,
+    tensorstore_context=None,
+    exit_when_finished=False,
+    **kwargs,
+):
+    """
+    Runs a worker that claims tasks from the shared work queue and stores
+    their results. Any number of workers can be run on any number of nodes
+    and, by default, each worker keeps polling for new submissions.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to SQLite database of the shared work queue.
+    gt_root : str, optional
+        Directory containing one subdirectory of ground truth SWC files per
+        block. Default is None, which means that gt_store.GT_ROOT is used.
+    tensorstore_context : tensorstore.Context, optional
+        Tensorstore context used to read the original images. Default is
+        None.
+    exit_when_finished : bool, optional
+        Indication of whether to return once every task in the queue is done
+        or failed. Default is False.
+    **kwargs
+        Keyword arguments passed to "work_queue.run_worker".
+
+    Returns
+    -------
+    int
+        Number of tasks completed by this worker.
+    """
+    if tensorstore_context is None:
+        tensorstore_context = get_default_tensorstore_context()
+    task_fns = {
+        "check_compressed_integrity": _run_integrity_task,
+        "check_ssim": partial(
+            _run_ssim_task, tensorstore_context=tensorstore_context
+        ),
+        "check_segmentation_consistency": partial(
+            _run_segmentation_task, gt_root=gt_root
+        ),
+        "compute_compressed_size": get_compressed_size,
+    }
+    return work_queue.run_worker(
+        db_path, task_fns, exit_when_finished=exit_when_finished, **kwargs
     )
-    results = pd.read_csv("./temp/results.csv")
-    return fill_nan_results(results)
 
 
-def fill_nan_results(df):
+def _run_integrity_task(zip_path, num):
     """
-    Replaces NaN values in 'Merge Rate' and 'Split Rate' columns with values
-    from 'SWC Run Length'.
+    Runs the compressed integrity check on a single block.
 
     Parameters
     ----------
-    df : pandas.DataFrame
-        Data frame containing skeleton metric results on the baseline
-        segmentation.
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
+    num : str
+        Unique identifier for an image block.
 
     Returns
     -------
-    df : pandas.DataFrame
-        Data frame containing skeleton metric results with NaN values
-        replaced.
+    List[str]
+        Status and message returned by "integrity.verify_compressed_block".
     """
-    # Approximate actual run length
+    return list(integrity.verify_compressed_block(zip_path, num))
+
+
+def _run_ssim_task(zip_path, num, tensorstore_context=None):
+    """
+    Computes the SSIM of a single block.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
+    num : str
+        Unique identifier for an image block.
+    tensorstore_context : tensorstore.Context, optional
+        Tensorstore context used to read the original image. Default is
+        None.
 
-    # Fill NaNs
-    df["Merge Rate"] = df["Merge Rate"].fillna(df["SWC Run Length"])
-    df["Split Rate"] = df["Split Rate"].fillna(df["SWC Run Length"])
-    return df
+    Returns
+    -------
+    float
+        SSIM between the decompressed and original images.
+    """
+    original = utils.read_zarr_downsampled_2x(
+        f"{IMG_ROOT}/block_{num}/input.zarr/0", context=tensorstore_context
+    )
+    ssim = _compute_ssim(original, zip_path, f"decompressed_{num}.tiff")
+    return float(ssim)
 
 
-def load_baseline_segmentation_result(num):
+def _run_segmentation_task(zip_path, num, gt_root=None):
     """
-    Loads the skeleton-based metric results for the baseline segmentation for
-    the image block corresponding to "num".
+    Computes the segmentation errors of a single block in a temporary
+    directory, so that workers on the same node do not collide.
 
     Parameters
     ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
     num : str
         Unique identifier for an image block.
+    gt_root : str, optional
+        Directory containing one subdirectory of ground truth SWC files per
+        block. Default is None, which means that gt_store.GT_ROOT is used.
 
     Returns
     -------
-    pandas.DataFrame
-        Skeleton-based metric results for the baseline segmentation.
+    dict
+        Dictionary that maps each metric in ERROR_TOLS to the difference
+        between the submitted and baseline weighted averages.
     """
-    base_dir = Path(__file__).resolve().parent
-    path = f"{base_dir}/baseline_segmentation_results/results_{num}.csv"
-    return fill_nan_results(pd.read_csv(path))
+    temp_dir = tempfile.mkdtemp(prefix=f"segmentation_{num}_")
+    try:
+        move_skeleton_zips(zip_path, [num], output_dir=temp_dir)
+        gt_path = gt_store.get_gt_path(num, gt_root=gt_root)
+        return compute_segmentation_errors(
+            zip_path, num, gt_path, temp_dir=temp_dir
+        )
+    finally:
+        utils.rmdir(temp_dir)
 
 
-def move_skeleton_zips(zip_path, block_nums):
+# --- Helpers ---
+@lru_cache
+def get_default_tensorstore_context():
+    """
+    Gets the tensorstore context used to read the original images when none
+    is provided. The context is created once per process, so that every read
+    in the process shares its resources.
+
+    Returns
+    -------
+    tensorstore.Context
+        Tensorstore context.
+    """
+    return utils.get_tensorstore_context(s3_request_concurrency=16)
+
+
+def compute_segmentation_metrics(zip_path, num, gt_path, temp_dir="./temp"):
+    """
+    Computes skeleton-based segmentation metrics for a given image.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
+    num : str
+        Unique identifier for an image block.
+    gt_path : str
+        Local directory containing the ground truth SWC files of the block,
+        see "gt_store.get_gt_path".
+    temp_dir : str, optional
+        Directory containing the extracted skeleton ZIP archive of the block,
+        which evaluation results are also written to. Default is "./temp".
+
+    Returns
+    -------
+    results : pandas.DataFrame
+        Data frame containing skeleton metric results.
+    """
+    # Paths
+    segmentation_filename = f"segmentation_{num}.tiff"
+    skeletons_path = f"{temp_dir}/skeletons_{num}.zip"
+    output_dir = temp_dir
+
+    # Read segmentation
+    segmentation = TiffImage(zip_path, inner_tiff=segmentation_filename)
+
+    # Run evaluation
+    evaluate(
+        gt_path,
+        segmentation,
+        output_dir,
+        anisotropy=(0.748, 0.748, 1.0),
+        fragments_path=skeletons_path,
+        verbose=False,
+    )
+    results = pd.read_csv(f"{output_dir}/results.csv")
+    return fill_nan_results(results)
+
+
+def move_skeleton_zips(zip_path, block_nums, output_dir="./temp/"):
     """
     Extracts specific skeleton ZIP archives from a parent ZIP file and moves
     them into a temporary directory. This extraction ensures that the SWC
@@ -352,9 +738,11 @@ def move_skeleton_zips(zip_path, block_nums):
         Path to a participant's submitted ZIP archive.
     block_nums : List[str]
         Block numbers specifying what blocks to use in evaluation.
+    output_dir : str, optional
+        Directory that skeleton ZIP archives are moved to. Default is
+        "./temp/".
     """
     # Initialize temp directory
-    output_dir = "./temp/"
     utils.mkdir(output_dir)
 
     # Iterate over skeletons
@@ -362,3 +750,42 @@ def move_skeleton_zips(zip_path, block_nums):
         source_filename = f"skeletons_{num}.zip"
         destination_path = f"{output_dir}/skeletons_{num}.zip"
         utils.move_zip_in_zip(zip_path, source_filename, destination_path)
+
+
+if __name__ == "__main__":
+    # Parse arguments
+    parser = argparse.ArgumentParser(
+        description="Scores a submission, optionally across several nodes."
+    )
+    parser.add_argument(
+        "--submission",
+        help="Path to submitted ZIP archive. Omit to run a worker.",
+    )
+    parser.add_argument(
+        "--queue",
+        help="Path to SQLite work queue shared by scoring nodes.",
+    )
+    parser.add_argument("--gt_root", default=None)
+    parser.add_argument("--timeout", default=21600, type=float)
+    parser.add_argument("--use_validation_blocks", action="store_true")
+    args = parser.parse_args()
+    if not args.queue and not args.submission:
+        parser.error("--submission is required unless --queue is given")
+
+    # Main
+    use_test_blocks = not args.use_validation_blocks
+    if args.queue and args.submission:
+        score_distributed(
+            args.submission,
+            args.queue,
+            use_test_blocks=use_test_blocks,
+            timeout=args.timeout,
+        )
+    elif args.queue:
+        run_scoring_worker(args.queue, gt_root=args.gt_root)
+    else:
+        score(
+            args.submission,
+            use_test_blocks=use_test_blocks,
+            gt_root=args.gt_root,
+        )
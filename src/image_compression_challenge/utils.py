@@ -8,6 +8,7 @@ Miscellaneous helper routines.
 
 """
 
+from concurrent.futures import CancelledError
 from skimage.metrics import structural_similarity as ssim
 
 import numpy as np
@@ -180,7 +181,34 @@ def downsample_mean_2x(img):
     ).mean(axis=(1, 3, 5))
 
 
-def get_tensorstore_args(img_path):
+def get_kvstore_args(path, s3_endpoint=None):
+    """
+    Gets the tensorstore key-value store spec for the given path.
+
+    Parameters
+    ----------
+    path : str
+        Path to a directory or object prefix, either local or on S3.
+    s3_endpoint : str, optional
+        URL of an S3-compatible server (e.g. a local S3 stand-in) to be used
+        instead of AWS. Default is None.
+
+    Returns
+    -------
+    kvstore_args : dict
+        Key-value store spec that can be used with tensorstore.
+    """
+    if path.startswith("s3://"):
+        bucket_name, prefix = parse_cloud_path(path)
+        kvstore_args = {"driver": "s3", "bucket": bucket_name, "path": prefix}
+        if s3_endpoint:
+            kvstore_args["endpoint"] = s3_endpoint
+        return kvstore_args
+    else:
+        return {"driver": "file", "path": path}
+
+
+def get_tensorstore_args(img_path, s3_endpoint=None):
     """
     Gets the arguments needed to use tensorstore to read the given zarr image.
 
@@ -188,26 +216,135 @@ def get_tensorstore_args(img_path):
     ----------
     img_path : str
         Path to image to be read.
+    s3_endpoint : str, optional
+        URL of an S3-compatible server to be used instead of AWS. Default is
+        None.
 
     Returns
     -------
     tensorstore_args : dict
         Arguments needed to use tensorstore to read the given zarr image.
     """
-    if img_path.startswith("s3://"):
-        bucket_name, path = parse_cloud_path(img_path)
-        tensorstore_args = {
-            "driver": "zarr",
-            "kvstore": {"driver": "s3", "bucket": bucket_name, "path": path},
-        }
-    else:
-        tensorstore_args = {
-            "driver": "zarr",
-            "kvstore": {"driver": "file", "path": img_path},
-        }
+    tensorstore_args = {
+        "driver": "zarr",
+        "kvstore": get_kvstore_args(img_path, s3_endpoint=s3_endpoint),
+    }
     return tensorstore_args
 
 
+def get_tensorstore_context(
+    cache_pool_bytes=0,
+    data_copy_concurrency=None,
+    file_io_concurrency=None,
+    s3_request_concurrency=None,
+):
+    """
+    Gets a tensorstore context whose resources are shared by every image
+    opened with it, so that a single context should be created per process
+    and passed to each open. Resources set to None are left at the
+    tensorstore defaults.
+
+    Parameters
+    ----------
+    cache_pool_bytes : int, optional
+        Size (in bytes) of the cache pool for decoded chunks. Default is 0.
+    data_copy_concurrency : int, optional
+        Maximum number of threads used to decode and copy chunks. Default is
+        None.
+    file_io_concurrency : int, optional
+        Maximum number of concurrent local file reads. Default is None.
+    s3_request_concurrency : int, optional
+        Maximum number of concurrent S3 requests. Default is None.
+
+    Returns
+    -------
+    tensorstore.Context
+        Tensorstore context.
+    """
+    context = {"cache_pool": {"total_bytes_limit": cache_pool_bytes}}
+    limits = {
+        "data_copy_concurrency": data_copy_concurrency,
+        "file_io_concurrency": file_io_concurrency,
+        "s3_request_concurrency": s3_request_concurrency,
+    }
+    for key, limit in limits.items():
+        if limit is not None:
+            context[key] = {"limit": limit}
+    return ts.Context(context)
+
+
+def get_zipped_tensorstore_args(zip_path, array_path, driver="zarr"):
+    """
+    Gets the arguments needed to use tensorstore to read a zarr image stored
+    within a ZIP archive without extracting it.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to ZIP archive containing the zarr image.
+    array_path : str
+        Path of the zarr array within the ZIP archive.
+    driver : str, optional
+        Tensorstore driver used to read the zarr array, which is either
+        "zarr" or "zarr3". Default is "zarr".
+
+    Returns
+    -------
+    tensorstore_args : dict
+        Arguments needed to use tensorstore to read the given zarr image.
+    """
+    tensorstore_args = {
+        "driver": driver,
+        "kvstore": {
+            "driver": "zip",
+            "base": get_kvstore_args(os.path.abspath(zip_path)),
+            "path": array_path.rstrip("/") + "/",
+        },
+    }
+    return tensorstore_args
+
+
+def list_kvstore(path):
+    """
+    Lists the keys stored under the given directory or object prefix.
+
+    Parameters
+    ----------
+    path : str
+        Path to a directory or object prefix, either local or on S3.
+
+    Returns
+    -------
+    List[str]
+        Keys relative to "path", sorted in lexicographic order.
+    """
+    path = path if path.endswith("/") else path + "/"
+    kvstore = ts.KvStore.open(get_kvstore_args(path)).result()
+    return sorted(key.decode() for key in kvstore.list().result())
+
+
+def read_kvstore(path, keys):
+    """
+    Reads the values stored under the given keys.
+
+    Parameters
+    ----------
+    path : str
+        Path to a directory or object prefix, either local or on S3.
+    keys : List[str]
+        Keys relative to "path" to be read.
+
+    Returns
+    -------
+    List[bytes]
+        Values stored under the given keys.
+    """
+    path = path if path.endswith("/") else path + "/"
+    kvstore = ts.KvStore.open(get_kvstore_args(path)).result()
+    futures = [kvstore.read(key) for key in keys]
+    return [bytes(future.result().value) for future in futures]
+
+
 def parse_cloud_path(path):
     """
     Parses a cloud storage path into its bucket name and key/prefix. Supports
@@ -232,7 +369,7 @@ def parse_cloud_path(path):
     return bucket_name, prefix
 
 
-def read_zarr(img_path):
+def read_zarr(img_path, context=None, s3_endpoint=None):
     """
     Reads a Zarr volume from S3.
 
@@ -240,18 +377,121 @@ def read_zarr(img_path):
     ----------
     img_path : str
         Path to Zarr directory.
+    context : tensorstore.Context, optional
+        Tensorstore context, see "get_tensorstore_context". Default is None,
+        which means that the default context is used.
+    s3_endpoint : str, optional
+        URL of an S3-compatible server to be used instead of AWS. Default is
+        None.
 
     Returns
     -------
     img : numpy.ndarray
         Image volume.
     """
-    args = get_tensorstore_args(img_path)
-    img = ts.open(args, open=True).result()
+    img = open_zarr(img_path, context=context, s3_endpoint=s3_endpoint)
     img = img.read().result()[:]
     return img
 
 
+def open_zarr(img_path, context=None, s3_endpoint=None):
+    """
+    Opens a Zarr volume without reading it, so that sub-regions can be read
+    asynchronously with "img[region].read()".
+
+    Parameters
+    ----------
+    img_path : str
+        Path to Zarr directory.
+    context : tensorstore.Context, optional
+        Tensorstore context, see "get_tensorstore_context". Default is None,
+        which means that the default context is used.
+    s3_endpoint : str, optional
+        URL of an S3-compatible server to be used instead of AWS. Default is
+        None.
+
+    Returns
+    -------
+    tensorstore.TensorStore
+        Handle to image volume.
+    """
+    args = get_tensorstore_args(img_path, s3_endpoint)
+    return ts.open(args, open=True, context=context).result()
+
+
+def iter_zarr_slabs(img, depth=None, prefetch=2):
+    """
+    Iterates over slabs of a Zarr volume along the z-axis (i.e. third to
+    last axis). Up to "prefetch" slabs are read asynchronously ahead of the
+    slab being yielded, so fetching overlaps with computation on the caller
+    side.
+
+    Parameters
+    ----------
+    img : tensorstore.TensorStore
+        Handle to image volume, see "open_zarr".
+    depth : int, optional
+        Number of z-slices per slab. Default is None, which means that the
+        chunk depth is used.
+    prefetch : int, optional
+        Number of slabs read ahead of the slab being yielded. Default is 2.
+
+    Yields
+    ------
+    numpy.ndarray
+        Slab of image volume.
+    """
+    depth = depth or img.chunk_layout.read_chunk.shape[-3]
+    depth_total = img.shape[-3]
+    pending = list()
+    for z0 in range(0, depth_total, depth):
+        z1 = min(z0 + depth, depth_total)
+        pending.append(img[..., z0:z1, :, :].read())
+        if len(pending) > prefetch:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def read_zarr_downsampled_2x(
+    img_path, context=None, s3_endpoint=None, stop_event=None
+):
+    """
+    Reads a Zarr volume with shape (1, 1, Z, Y, X) and downsamples it by a
+    factor of 2 along each spatial axis, one slab at a time while the next
+    slabs are fetched. The result is stored as float32, which is exact for
+    the mean of 8 voxels with a 16-bit integer data type.
+
+    Parameters
+    ----------
+    img_path : str
+        Path to Zarr directory.
+    context : tensorstore.Context, optional
+        Tensorstore context, see "get_tensorstore_context". Default is None,
+        which means that the default context is used.
+    s3_endpoint : str, optional
+        URL of an S3-compatible server to be used instead of AWS. Default is
+        None.
+    stop_event : threading.Event, optional
+        Event that stops reading before the next slab once set, in which
+        case a CancelledError is raised. Default is None.
+
+    Returns
+    -------
+    numpy.ndarray
+        Downsampled image volume with shape (Z // 2, Y // 2, X // 2).
+    """
+    img = open_zarr(img_path, context=context, s3_endpoint=s3_endpoint)
+    depth = img.chunk_layout.read_chunk.shape[-3]
+    depth += depth % 2
+    slabs = list()
+    for slab in iter_zarr_slabs(img, depth=depth):
+        if stop_event is not None and stop_event.is_set():
+            raise CancelledError(f"Stopped reading {img_path}")
+        slabs.append(downsample_mean_2x(slab[0, 0]).astype(np.float32))
+    return np.concatenate(slabs, axis=0)
+
+
 def read_zipped_tiff(zip_path, filename):
     """
     Reads an TIFF file contained within a ZIP archive.
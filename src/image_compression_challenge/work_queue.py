@@ -0,0 +1,459 @@
+"""
+Work queue backed by a SQLite database that is shared between scoring nodes.
+Each task is a (submission, block, check) triple, where a submission is
+identified by its path and a version that changes whenever the file at that
+path changes. Workers claim tasks under a lease that expires if the worker
+dies, so that the task can be claimed again by another worker, and results
+are written idempotently.
+
+Note: the database must be stored on a filesystem with working file locks
+(e.g. a local disk or an NFS mount with locking enabled), and submissions
+must be stored at paths that are readable by every worker.
+
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    zip_path TEXT NOT NULL,
+    version TEXT NOT NULL,
+    num TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (zip_path, version, num, check_name)
+)
+"""
+KEY_CLAUSE = "zip_path = ? AND version = ? AND num = ? AND check_name = ?"
+
+
+class TaskQueue:
+    """
+    Class that implements a work queue of (submission, block, check) tasks
+    stored in a SQLite database.
+
+    """
+
+    def __init__(self, db_path, max_attempts=3, timeout=60):
+        """
+        Instantiates a TaskQueue object.
+
+        Parameters
+        ----------
+        db_path : str
+            Path to SQLite database, which is created if it does not exist.
+        max_attempts : int, optional
+            Maximum number of times that a task is claimed before it is
+            marked as failed. Default is 3.
+        timeout : float, optional
+            Number of seconds to wait for the database lock. Default is 60.
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._execute(SCHEMA)
+
+    def _connect(self):
+        """
+        Opens a connection to the database, where transactions are managed
+        explicitly with "BEGIN IMMEDIATE".
+
+        Returns
+        -------
+        sqlite3.Connection
+            Connection to the database.
+        """
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.timeout, isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, params=()):
+        """
+        Executes a single statement within a write transaction.
+
+        Parameters
+        ----------
+        sql : str
+            SQL statement to be executed.
+        params : tuple, optional
+            Parameters of SQL statement. Default is an empty tuple.
+
+        Returns
+        -------
+        int
+            Number of rows modified by the statement.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rowcount = conn.execute(sql, params).rowcount
+            conn.execute("COMMIT")
+            return rowcount
+        finally:
+            conn.close()
+
+    # --- Producer ---
+    def enqueue(self, zip_path, block_nums, check_names, version=""):
+        """
+        Adds a task for each block and check of a submission. Tasks of the
+        same version that are already in the queue are left unchanged, while
+        tasks of other versions of the submission are removed.
+
+        Parameters
+        ----------
+        zip_path : str
+            Path to a participant's submitted ZIP archive.
+        block_nums : List[str]
+            Block numbers specifying what blocks to use in evaluation.
+        check_names : List[str]
+            Names of checks to be run on each block.
+        version : str, optional
+            Version of the submission, see "get_version". Default is an empty
+            string.
+        """
+        tasks = [
+            (zip_path, version, n, c) for n in block_nums for c in check_names
+        ]
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM tasks WHERE zip_path = ? AND version != ?",
+                (zip_path, version),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks "
+                "(zip_path, version, num, check_name) VALUES (?, ?, ?, ?)",
+                tasks,
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    # --- Consumer ---
+    def claim(self, worker, lease_seconds):
+        """
+        Claims a pending task or a running task whose lease has expired.
+
+        Parameters
+        ----------
+        worker : str
+            Unique identifier of the worker claiming the task.
+        lease_seconds : float
+            Number of seconds until the lease on the task expires.
+
+        Returns
+        -------
+        dict or None
+            Task with the keys "zip_path", "version", "num", "check_name",
+            and "attempts" if a task was claimed. Otherwise, None.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT zip_path, version, num, check_name, attempts "
+                "FROM tasks WHERE status = 'pending' OR "
+                "(status = 'running' AND lease_expires < ?) "
+                "ORDER BY attempts, rowid LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            # Check whether task has too many attempts
+            task = dict(row)
+            if task["attempts"] >= self.max_attempts:
+                conn.execute(
+                    "UPDATE tasks SET status = 'failed', "
+                    "error = COALESCE(error, 'Lease expired') "
+                    f"WHERE {KEY_CLAUSE}",
+                    _key(task),
+                )
+                conn.execute("COMMIT")
+                return self.claim(worker, lease_seconds)
+
+            # Claim task
+            conn.execute(
+                "UPDATE tasks SET status = 'running', worker = ?, "
+                "lease_expires = ?, attempts = attempts + 1 "
+                f"WHERE {KEY_CLAUSE}",
+                (worker, now + lease_seconds) + _key(task),
+            )
+            conn.execute("COMMIT")
+            task["attempts"] += 1
+            return task
+        finally:
+            conn.close()
+
+    def renew(self, task, worker, lease_seconds):
+        """
+        Extends the lease on a task that is held by the given worker.
+
+        Parameters
+        ----------
+        task : dict
+            Task returned by "claim".
+        worker : str
+            Unique identifier of the worker holding the task.
+        lease_seconds : float
+            Number of seconds until the lease on the task expires.
+
+        Returns
+        -------
+        bool
+            Indication of whether the lease was extended.
+        """
+        rowcount = self._execute(
+            "UPDATE tasks SET lease_expires = ? "
+            f"WHERE {KEY_CLAUSE} "
+            "AND status = 'running' AND worker = ?",
+            (time.time() + lease_seconds,) + _key(task) + (worker,),
+        )
+        return rowcount > 0
+
+    def complete(self, task, result):
+        """
+        Stores the result of a task. Since results are deterministic, the
+        first result that is stored is kept and later ones are ignored.
+
+        Parameters
+        ----------
+        task : dict
+            Task returned by "claim".
+        result : Any
+            JSON-serializable result of the task.
+
+        Returns
+        -------
+        bool
+            Indication of whether the result was stored.
+        """
+        rowcount = self._execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL "
+            f"WHERE {KEY_CLAUSE} "
+            "AND status != 'done'",
+            (json.dumps(result),) + _key(task),
+        )
+        return rowcount > 0
+
+    def fail(self, task, worker, error):
+        """
+        Releases a task after an error, so that it is retried unless it has
+        reached the maximum number of attempts.
+
+        Parameters
+        ----------
+        task : dict
+            Task returned by "claim".
+        worker : str
+            Unique identifier of the worker holding the task.
+        error : str
+            Description of the error.
+        """
+        if task["attempts"] >= self.max_attempts:
+            status = "failed"
+        else:
+            status = "pending"
+        self._execute(
+            "UPDATE tasks SET status = ?, error = ?, worker = NULL "
+            f"WHERE {KEY_CLAUSE} "
+            "AND status = 'running' AND worker = ?",
+            (status, error) + _key(task) + (worker,),
+        )
+
+    # --- Coordinator ---
+    def get_tasks(self, zip_path=None):
+        """
+        Gets the tasks in the queue.
+
+        Parameters
+        ----------
+        zip_path : str, optional
+            Path to a participant's submitted ZIP archive. Default is None,
+            which means that the tasks of every submission are returned.
+
+        Returns
+        -------
+        List[dict]
+            Tasks in the queue, where the result of a completed task is
+            stored under the key "result".
+        """
+        conn = self._connect()
+        try:
+            sql = "SELECT * FROM tasks"
+            params = ()
+            if zip_path is not None:
+                sql += " WHERE zip_path = ?"
+                params = (zip_path,)
+            tasks = [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+        for task in tasks:
+            if task["result"] is not None:
+                task["result"] = json.loads(task["result"])
+        return tasks
+
+    def is_finished(self, zip_path=None):
+        """
+        Checks whether every task is either done or failed, where a queue
+        without any tasks is not finished.
+
+        Parameters
+        ----------
+        zip_path : str, optional
+            Path to a participant's submitted ZIP archive. Default is None,
+            which means that the tasks of every submission are checked.
+
+        Returns
+        -------
+        bool
+            Indication of whether every task is either done or failed.
+        """
+        statuses = {task["status"] for task in self.get_tasks(zip_path)}
+        return bool(statuses) and statuses.issubset({"done", "failed"})
+
+
+def run_worker(
+    db_path,
+    task_fns,
+    worker=None,
+    max_attempts=3,
+    lease_seconds=600,
+    poll_interval=5,
+    exit_when_finished=True,
+):
+    """
+    Claims and runs tasks from the queue. While a task is running, its lease
+    is renewed in the background.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to SQLite database.
+    task_fns : dict
+        Dictionary that maps check names to a function that takes the ZIP
+        path and block number, then returns a JSON-serializable result.
+    worker : str, optional
+        Unique identifier of the worker. Default is None, which means that
+        the hostname and process ID are used.
+    max_attempts : int, optional
+        Maximum number of times that a task is claimed before it is marked
+        as failed. Default is 3.
+    lease_seconds : float, optional
+        Number of seconds until the lease on a task expires. Default is 600.
+    poll_interval : float, optional
+        Number of seconds to wait when no task can be claimed. Default is 5.
+    exit_when_finished : bool, optional
+        Indication of whether to return once the queue contains tasks and
+        every task is done or failed. Otherwise, the worker keeps polling for
+        new tasks. Default is True.
+
+    Returns
+    -------
+    int
+        Number of tasks completed by this worker.
+    """
+    queue = TaskQueue(db_path, max_attempts=max_attempts)
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    n_completed = 0
+    while True:
+        # Claim task
+        task = queue.claim(worker, lease_seconds)
+        if task is None:
+            if exit_when_finished and queue.is_finished():
+                return n_completed
+            time.sleep(poll_interval)
+            continue
+
+        # Run task
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_renew_lease,
+            args=(queue, task, worker, lease_seconds, stop),
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            fn = task_fns[task["check_name"]]
+            result = fn(task["zip_path"], task["num"])
+        except Exception as e:
+            queue.fail(task, worker, f"{type(e).__name__}: {e}")
+        else:
+            n_completed += int(queue.complete(task, result))
+        finally:
+            stop.set()
+            heartbeat.join()
+
+
+# --- Helpers ---
+def get_version(zip_path):
+    """
+    Gets the version of a submission, which changes whenever the file at
+    the given path is replaced or modified.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path to a participant's submitted ZIP archive.
+
+    Returns
+    -------
+    str
+        Size (in bytes) and modification time (in nanoseconds) of the file.
+    """
+    stat = os.stat(zip_path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _key(task):
+    """
+    Gets the primary key of a task.
+
+    Parameters
+    ----------
+    task : dict
+        Task returned by "TaskQueue.claim".
+
+    Returns
+    -------
+    tuple
+        Primary key of the task.
+    """
+    return (task["zip_path"], task["version"], task["num"], task["check_name"])
+
+
+def _renew_lease(queue, task, worker, lease_seconds, stop):
+    """
+    Renews the lease on a task until the given event is set.
+
+    Parameters
+    ----------
+    queue : TaskQueue
+        Work queue containing the task.
+    task : dict
+        Task returned by "TaskQueue.claim".
+    worker : str
+        Unique identifier of the worker holding the task.
+    lease_seconds : float
+        Number of seconds until the lease on the task expires.
+    stop : threading.Event
+        Event that is set once the task is finished.
+    """
+    while not stop.wait(lease_seconds / 3):
+        queue.renew(task, worker, lease_seconds)
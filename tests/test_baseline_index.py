@@ -0,0 +1,78 @@
+"""Tests for the index of baseline segmentation metrics."""
+
+from segmentation_skeleton_metrics.utils.util import compute_weighted_avg
+
+import numpy as np
+import os
+import pandas as pd
+import shutil
+import tempfile
+import unittest
+
+from image_compression_challenge import baseline_index
+
+NUMS = ["000", "001"]
+
+
+class BaselineIndexTest(unittest.TestCase):
+    """Tests building, loading, and rebuilding the baseline index."""
+
+    def setUp(self):
+        """Copies a subset of the baseline CSV files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.baseline_dir = os.path.join(self.tmp_dir.name, "baseline")
+        self.index_path = os.path.join(self.tmp_dir.name, "index.npz")
+        os.makedirs(self.baseline_dir)
+        for num in NUMS:
+            shutil.copy(
+                baseline_index.BASELINE_DIR / f"results_{num}.csv",
+                self.baseline_dir,
+            )
+        baseline_index.load_index.cache_clear()
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        baseline_index.load_index.cache_clear()
+        self.tmp_dir.cleanup()
+
+    def test_get_weighted_avg(self):
+        """Tests that indexed averages match the baseline CSV files."""
+        for num in NUMS:
+            path = os.path.join(self.baseline_dir, f"results_{num}.csv")
+            df = baseline_index.fill_nan_results(pd.read_csv(path))
+            for metric in ["Split Rate", "Merge Rate"]:
+                avg = baseline_index.get_weighted_avg(
+                    num, metric, self.index_path, self.baseline_dir
+                )
+                self.assertAlmostEqual(avg, compute_weighted_avg(df, metric))
+        self.assertTrue(os.path.exists(self.index_path))
+
+    def test_round_trip(self):
+        """Tests that a saved index loads to the averages it was built from."""
+        index = baseline_index.build_index(
+            self.index_path, self.baseline_dir, max_workers=1
+        )
+        self.assertEqual(sorted(index), NUMS)
+        loaded = baseline_index.load_index(self.index_path, self.baseline_dir)
+        self.assertEqual(sorted(loaded), NUMS)
+        for num in NUMS:
+            self.assertEqual(sorted(loaded[num]), sorted(index[num]))
+            for metric, value in index[num].items():
+                np.testing.assert_equal(loaded[num][metric], value)
+
+    def test_stale_index(self):
+        """Tests that the index is rebuilt after a CSV file changes."""
+        baseline_index.build_index(
+            self.index_path, self.baseline_dir, max_workers=1
+        )
+        path = os.path.join(self.baseline_dir, "results_000.csv")
+        df = pd.read_csv(path)
+        df["Split Rate"] = 1.0
+        df.to_csv(path, index=False)
+
+        index = baseline_index.load_index(self.index_path, self.baseline_dir)
+        self.assertAlmostEqual(index["000"]["Split Rate"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
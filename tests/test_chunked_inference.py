@@ -0,0 +1,98 @@
+"""Tests for running inference on an image chunk by chunk."""
+
+from scipy.ndimage import uniform_filter
+
+import numpy as np
+import os
+import tempfile
+import tifffile
+import unittest
+
+from image_compression_challenge import chunked_inference, qc
+
+
+def predict(img):
+    """
+    Stub of "inference.predict" that returns two channels, each of which
+    only depends on a 5 x 5 x 5 neighborhood of every voxel.
+    """
+    img = img.astype(np.float32)
+    return np.stack([uniform_filter(img, size=5), img**2])
+
+
+class ChunkedInferenceTest(unittest.TestCase):
+    """Tests that chunked inference matches full-volume inference."""
+
+    def setUp(self):
+        """Creates an image with shape (Z, Y, X)."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.img = rng.integers(0, 500, size=(13, 17, 11), dtype=np.uint16)
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_iter_chunks(self):
+        """Tests that chunks tile the image without overlap."""
+        covered = np.zeros(self.img.shape, dtype=int)
+        for chunk in chunked_inference.iter_chunks(self.img.shape, (5, 8, 11)):
+            covered[chunk] += 1
+        self.assertTrue(np.all(covered == 1))
+
+    def test_add_halo(self):
+        """Tests that halos are clipped to the image bounds."""
+        chunk = (slice(0, 5), slice(8, 16), slice(0, 11))
+        padded, crop = chunked_inference.add_halo(
+            chunk, (2, 2, 2), self.img.shape
+        )
+        self.assertEqual(padded, (slice(0, 7), slice(6, 17), slice(0, 11)))
+        self.assertEqual(crop, (slice(0, 5), slice(2, 10), slice(0, 11)))
+
+    def test_predict_by_chunk(self):
+        """Tests that halo-trimmed chunks match a full-volume prediction."""
+        accumulator = qc.QCAccumulator(self.img.shape, hist_range=(0, 500))
+        affinities = chunked_inference.predict_by_chunk(
+            self.img,
+            predict,
+            os.path.join(self.tmp_dir.name, "affinities.npy"),
+            chunk_shape=(5, 8, 4),
+            halo=(2, 2, 2),
+            accumulator=accumulator,
+        )
+
+        expected = predict(self.img)
+        np.testing.assert_allclose(affinities, expected, rtol=1e-6)
+        np.testing.assert_allclose(
+            accumulator.to_dict()["mip_yx"], expected[0].max(axis=0)
+        )
+
+    def test_write_tiff_by_slab(self):
+        """Tests writing a TIFF with leading singleton dimensions."""
+        path = os.path.join(self.tmp_dir.name, "img.tiff")
+        accumulator = qc.QCAccumulator(self.img.shape)
+        chunked_inference.write_tiff_by_slab(
+            path,
+            self.img,
+            slab_depth=4,
+            shape=(1, 1) + self.img.shape,
+            accumulators=[accumulator],
+        )
+
+        img = tifffile.imread(path)
+        self.assertEqual(img.shape, (1, 1) + self.img.shape)
+        np.testing.assert_array_equal(img[0, 0], self.img)
+        np.testing.assert_array_equal(
+            accumulator.to_dict()["mip_zy"], self.img.max(axis=2)
+        )
+
+    def test_is_bigtiff(self):
+        """Tests that images over 4 GB are written as BigTIFFs."""
+        self.assertFalse(chunked_inference.is_bigtiff(self.img.shape, "u2"))
+        self.assertTrue(
+            chunked_inference.is_bigtiff((1024, 2048, 1024), np.uint16)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
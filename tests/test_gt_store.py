@@ -0,0 +1,69 @@
+"""Tests for the local store of ground truth skeletons."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from image_compression_challenge import gt_store
+
+SWC_1 = """# comment
+# OFFSET 1.5 2.5 3.5
+1 2 10.0 20.0 30.0 1.0 -1
+2 2 11.0 21.0 31.0 1.0 1
+3 2 12.5 22.5 32.5 1.5 2
+4 2 12345.678901 23456.789012 34567.890123 1.25 3
+"""
+SWC_2 = "1 2 0.0 0.0 0.0 1.0 -1\n"
+
+
+class GTStoreTest(unittest.TestCase):
+    """Tests building and reading the ground truth skeleton cache."""
+
+    def setUp(self):
+        """Writes a local ground truth root with a single block."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.gt_root = os.path.join(self.tmp_dir.name, "swcs")
+        self.cache_root = os.path.join(self.tmp_dir.name, "cache")
+        block_dir = os.path.join(self.gt_root, "block_000")
+        os.makedirs(block_dir)
+        for name, content in [("a.swc", SWC_1), ("b.swc", SWC_2)]:
+            with open(os.path.join(block_dir, name), "w") as f:
+                f.write(content)
+        with open(os.path.join(block_dir, "README.txt"), "w") as f:
+            f.write("not an swc")
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_get_gt_path(self):
+        """Tests that cached SWC files are identical to the source files."""
+        swc_dir = gt_store.get_gt_path("000", self.gt_root, self.cache_root)
+        self.assertTrue(swc_dir.startswith(self.cache_root))
+        self.assertIn(gt_store.CACHE_VERSION, swc_dir)
+        self.assertEqual(sorted(os.listdir(swc_dir)), ["a.swc", "b.swc"])
+        for name, content in [("a.swc", SWC_1), ("b.swc", SWC_2)]:
+            with open(os.path.join(swc_dir, name)) as f:
+                self.assertEqual(f.read(), content)
+
+    def test_cache_is_reused(self):
+        """Tests that a cached block is not read from the source again."""
+        swc_dir = gt_store.get_gt_path("000", self.gt_root, self.cache_root)
+        shutil.rmtree(self.gt_root)
+        self.assertEqual(
+            gt_store.get_gt_path("000", self.gt_root, self.cache_root),
+            swc_dir,
+        )
+        self.assertEqual(sorted(os.listdir(swc_dir)), ["a.swc", "b.swc"])
+
+    def test_missing_block(self):
+        """Tests that a block without SWC files is not cached."""
+        with self.assertRaises(FileNotFoundError):
+            gt_store.get_gt_path("001", self.gt_root, self.cache_root)
+        path = gt_store.get_block_path("001", self.gt_root, self.cache_root)
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Tests for verifying compressed images against decompressed images."""
+
+import json
+import numpy as np
+import os
+import tempfile
+import tensorstore as ts
+import tifffile
+import unittest
+import zipfile
+
+from image_compression_challenge import integrity
+
+
+class IntegrityTest(unittest.TestCase):
+    """Tests verification of compressed images stored in a ZIP archive."""
+
+    def setUp(self):
+        """Creates an image that is used as the decompressed image."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.img = np.arange(8 * 16 * 12, dtype=np.uint16)
+        self.img = self.img.reshape(1, 1, 8, 16, 12)
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def write_submission(
+        self, compressed, compressed_format="zarr", compressor=None, tile=None
+    ):
+        """
+        Writes a ZIP archive containing a compressed and decompressed image.
+
+        Parameters
+        ----------
+        compressed : numpy.ndarray
+            Image that is stored as the compressed image.
+        compressed_format : str, optional
+            Format of the compressed image. Default is "zarr".
+        compressor : dict, optional
+            Compressor written to the zarr metadata after the image is
+            written. Default is None.
+        tile : Tuple[int], optional
+            Tile shape of the decompressed TIFF image. Default is None.
+
+        Returns
+        -------
+        str
+            Path to the ZIP archive.
+        """
+        root = self.tmp_dir.name
+        tiff_path = os.path.join(root, "decompressed_000.tiff")
+        img = self.img[0, 0] if tile else self.img
+        tifffile.imwrite(tiff_path, img, compression="zlib", tile=tile)
+
+        zip_path = os.path.join(root, "submission.zip")
+        with zipfile.ZipFile(zip_path, "w") as z:
+            z.write(tiff_path, "decompressed_000.tiff")
+            if compressed_format == "zarr":
+                zarr_path = os.path.join(root, "compressed_000.zarr", "0")
+                spec = {
+                    "driver": "zarr",
+                    "kvstore": {"driver": "file", "path": zarr_path},
+                    "metadata": {
+                        "shape": list(compressed.shape),
+                        "chunks": [1, 1, 3, 8, 5],
+                        "dtype": "<u2",
+                    },
+                    "create": True,
+                }
+                ts.open(spec).result().write(compressed).result()
+                if compressor:
+                    metadata_path = os.path.join(zarr_path, ".zarray")
+                    with open(metadata_path) as f:
+                        metadata = json.load(f)
+                    metadata["compressor"] = compressor
+                    with open(metadata_path, "w") as f:
+                        json.dump(metadata, f)
+                for name in os.listdir(zarr_path):
+                    path = os.path.join(zarr_path, name)
+                    z.write(path, f"compressed_000.zarr/0/{name}")
+            else:
+                z.writestr(f"compressed_000.{compressed_format}", b"data")
+        return zip_path
+
+    def test_matching_block(self):
+        """Tests that an exact compressed image passes."""
+        zip_path = self.write_submission(self.img)
+        status, _ = integrity.verify_compressed_block(zip_path, "000")
+        self.assertEqual(status, "ok")
+
+    def test_mismatching_block(self):
+        """Tests that a single changed voxel is detected."""
+        compressed = self.img.copy()
+        compressed[0, 0, 7, 15, 11] += 1
+        zip_path = self.write_submission(compressed)
+        status, msg = integrity.verify_compressed_block(zip_path, "000")
+        self.assertEqual(status, "mismatch")
+        self.assertIn("(6, 8, 10)", msg)
+
+    def test_unsupported_format(self):
+        """Tests that a format without a reader is reported."""
+        zip_path = self.write_submission(None, compressed_format="jp2")
+        status, msg = integrity.verify_compressed_block(zip_path, "000")
+        self.assertEqual(status, "unsupported")
+        self.assertIn("compressed_000.jp2", msg)
+
+    def test_unsupported_codec(self):
+        """Tests that a zarr with an unknown codec is reported."""
+        zip_path = self.write_submission(
+            self.img, compressor={"id": "jpegxl"}
+        )
+        status, msg = integrity.verify_compressed_block(zip_path, "000")
+        self.assertEqual(status, "unsupported")
+        self.assertIn("compressed_000.zarr/0", msg)
+
+    def test_volumetric_tiff(self):
+        """Tests a decompressed TIFF that does not store a page per slice."""
+        zip_path = self.write_submission(self.img, tile=(4, 16, 16))
+        status, msg = integrity.verify_compressed_block(zip_path, "000")
+        self.assertEqual(status, "unsupported")
+        self.assertIn("page per z-slice", msg)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""Tests for prefetching reference data."""
+
+from unittest import mock
+
+import numpy as np
+import os
+import tempfile
+import tensorstore as ts
+import unittest
+
+from image_compression_challenge import prefetch, utils
+
+try:
+    from moto.server import ThreadedMotoServer
+
+    import boto3
+except ImportError:
+    ThreadedMotoServer = None
+
+BLOCK_NUMS = ["000", "001"]
+S3_CREDENTIALS = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def write_original(kvstore, img):
+    """Writes an original image as a chunked zarr to the given kvstore."""
+    spec = {
+        "driver": "zarr",
+        "kvstore": kvstore,
+        "metadata": {
+            "shape": list(img.shape),
+            "chunks": [1, 1, 2, 6, 8],
+            "dtype": "<u2",
+        },
+        "create": True,
+    }
+    ts.open(spec).result().write(img).result()
+
+
+class PrefetcherTest(unittest.TestCase):
+    """Tests prefetching from local stand-ins of the reference data."""
+
+    def setUp(self):
+        """Writes an original image and an SWC file for each block."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.img_root = os.path.join(self.tmp_dir.name, "blocks")
+        self.gt_root = os.path.join(self.tmp_dir.name, "swcs")
+        self.imgs = dict()
+        for i, num in enumerate(BLOCK_NUMS):
+            # Original image
+            self.imgs[num] = np.full((1, 1, 4, 6, 8), i, dtype=np.uint16)
+            path = f"{self.img_root}/block_{num}/input.zarr/0"
+            write_original(utils.get_kvstore_args(path), self.imgs[num])
+
+            # Ground truth skeleton
+            block_dir = os.path.join(self.gt_root, f"block_{num}")
+            os.makedirs(block_dir)
+            with open(os.path.join(block_dir, "a.swc"), "w") as f:
+                f.write(f"1 2 {i} 0 0 1 -1\n")
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_prefetcher(self):
+        """Tests that every original image and skeleton is prefetched."""
+        cache_root = os.path.join(self.tmp_dir.name, "cache")
+        with prefetch.Prefetcher(
+            BLOCK_NUMS,
+            self.img_root,
+            gt_root=self.gt_root,
+            cache_root=cache_root,
+        ) as prefetcher:
+            for num in BLOCK_NUMS:
+                original = prefetcher.get_original(num).result()
+                expected = utils.downsample_mean_2x(self.imgs[num][0, 0])
+                np.testing.assert_array_equal(original, expected)
+                self.assertEqual(original.dtype, np.float32)
+
+                gt_path = prefetcher.get_gt_path(num)
+                self.assertTrue(gt_path.startswith(cache_root))
+                self.assertEqual(os.listdir(gt_path), ["a.swc"])
+
+    def test_read_ahead(self):
+        """Tests that original images are only read ahead of the consumer."""
+        with prefetch.Prefetcher(
+            BLOCK_NUMS,
+            self.img_root,
+            gt_root=self.gt_root,
+            cache_root=os.path.join(self.tmp_dir.name, "cache"),
+            read_ahead=1,
+        ) as prefetcher:
+            self.assertEqual(list(prefetcher.originals), ["000"])
+            prefetcher.get_original("000").result()
+            self.assertEqual(list(prefetcher.originals), ["001"])
+            prefetcher.get_original("001").result()
+            self.assertEqual(prefetcher.originals, dict())
+
+            # Wait for skeletons before the cache is removed
+            for num in BLOCK_NUMS:
+                prefetcher.get_gt_path(num)
+
+    @unittest.skipIf(ThreadedMotoServer is None, "moto is not installed")
+    @mock.patch.dict(os.environ, S3_CREDENTIALS)
+    def test_s3_endpoint(self):
+        """Tests reading original images from a local S3 stand-in."""
+        server = ThreadedMotoServer(port=0, verbose=False)
+        server.start()
+        self.addCleanup(server.stop)
+        endpoint = "http://{}:{}".format(*server.get_host_and_port())
+
+        # Copy original images to S3
+        boto3.client("s3", endpoint_url=endpoint).create_bucket(
+            Bucket="bucket"
+        )
+        for num in BLOCK_NUMS:
+            path = f"s3://bucket/blocks/block_{num}/input.zarr/0/"
+            kvstore = utils.get_kvstore_args(path, s3_endpoint=endpoint)
+            write_original(kvstore, self.imgs[num])
+
+        # Read original images
+        with prefetch.Prefetcher(
+            BLOCK_NUMS,
+            "s3://bucket/blocks",
+            gt_root=self.gt_root,
+            cache_root=os.path.join(self.tmp_dir.name, "cache"),
+            s3_endpoint=endpoint,
+        ) as prefetcher:
+            for num in BLOCK_NUMS:
+                original = prefetcher.get_original(num).result()
+                expected = utils.downsample_mean_2x(self.imgs[num][0, 0])
+                np.testing.assert_array_equal(original, expected)
+                prefetcher.get_gt_path(num)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests for streaming accumulation of QC statistics."""
+
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from image_compression_challenge import qc
+
+
+class QCAccumulatorTest(unittest.TestCase):
+    """Tests that chunked updates match full-volume statistics."""
+
+    def setUp(self):
+        """Creates an image and a segmentation with shape (Z, Y, X)."""
+        rng = np.random.default_rng(0)
+        self.img = rng.integers(0, 500, size=(6, 7, 5), dtype=np.uint16)
+        self.segmentation = rng.integers(0, 4, size=(6, 7, 5))
+
+    def test_update(self):
+        """Tests updates with chunks that tile the image."""
+        accumulator = qc.QCAccumulator(
+            self.img.shape, hist_range=(0, 500), n_bins=10
+        )
+        for z0, y0 in [(0, 0), (0, 4), (3, 0), (3, 4)]:
+            region = (slice(z0, z0 + 3), slice(y0, y0 + 4), slice(0, 5))
+            accumulator.update(self.img[region], region)
+
+        stats = accumulator.to_dict()
+        for axis, name in enumerate(["mip_yx", "mip_zx", "mip_zy"]):
+            expected = self.img.max(axis=axis)
+            np.testing.assert_array_equal(stats[name], expected)
+
+        expected = np.histogram(self.img, bins=10, range=(0, 500))[0]
+        np.testing.assert_array_equal(stats["hist_counts"], expected)
+
+    def test_label_counts(self):
+        """Tests per-label voxel counts accumulated over slabs."""
+        accumulator = qc.QCAccumulator(self.segmentation.shape, labels=True)
+        accumulator.update_by_slab(self.segmentation, slab_depth=4)
+
+        stats = accumulator.to_dict(prefix="segmentation_")
+        labels, counts = np.unique(self.segmentation, return_counts=True)
+        np.testing.assert_array_equal(stats["segmentation_labels"], labels)
+        np.testing.assert_array_equal(
+            stats["segmentation_label_counts"], counts
+        )
+        self.assertNotIn("segmentation_hist_counts", stats)
+
+    def test_save_qc(self):
+        """Tests saving the statistics of several images together."""
+        accumulators = {
+            "input": qc.QCAccumulator(self.img.shape, hist_range=(0, 500)),
+            "segmentation": qc.QCAccumulator(
+                self.segmentation.shape, labels=True
+            ),
+        }
+        accumulators["input"].update_by_slab(self.img, slab_depth=2)
+        accumulators["segmentation"].update_by_slab(
+            self.segmentation, slab_depth=2
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "qc_000.npz")
+            qc.save_qc(path, accumulators)
+            with np.load(path) as npz:
+                self.assertIn("input_mip_yx", npz.files)
+                self.assertIn("input_hist_counts", npz.files)
+                self.assertIn("segmentation_label_counts", npz.files)
+                self.assertEqual(npz["input_mip_zy"].shape, (6, 7))
+
+            paths = qc.plot_mips(path, tmp_dir, suffix="_000")
+            self.assertEqual(
+                sorted(os.path.basename(p) for p in paths),
+                ["input_000.png", "segmentation_000.png"],
+            )
+            self.assertTrue(all(os.path.exists(p) for p in paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Tests for assembling scores from the results of distributed tasks."""
+
+import os
+import tempfile
+import threading
+import unittest
+import zipfile
+
+from image_compression_challenge import score, work_queue
+
+BLOCK_NUMS = score.VALIDATE_NUMS
+
+
+def get_compressed_size(zip_path, num):
+    """Returns a compressed size that depends on the block."""
+    return float(num)
+
+
+TASK_FNS = {
+    "check_compressed_integrity": lambda zip_path, num: ["ok", ""],
+    "check_ssim": lambda zip_path, num: 0.95,
+    "check_segmentation_consistency": lambda zip_path, num: {
+        metric: 0.0 for metric in score.ERROR_TOLS
+    },
+    "compute_compressed_size": get_compressed_size,
+}
+
+
+def make_tasks(**results):
+    """
+    Creates finished tasks for every block and check, where the results
+    given as keyword arguments override those of TASK_FNS.
+    """
+    tasks = list()
+    for num in BLOCK_NUMS:
+        for check_name, fn in TASK_FNS.items():
+            result = results.get(check_name, fn("sub.zip", num))
+            tasks.append(
+                {
+                    "num": num,
+                    "check_name": check_name,
+                    "status": "done",
+                    "result": result,
+                    "error": None,
+                }
+            )
+    return tasks
+
+
+class AssembleScoreTest(unittest.TestCase):
+    """Tests that task results are checked as in "score"."""
+
+    def test_assemble_score(self):
+        """Tests the score of a submission that passes every check."""
+        compression_score = score.assemble_score(make_tasks(), BLOCK_NUMS)
+        self.assertAlmostEqual(compression_score, 2.0)
+
+    def test_failed_task(self):
+        """Tests that a failed task fails the submission."""
+        tasks = make_tasks()
+        tasks[0].update({"status": "failed", "error": "corrupt block"})
+        with self.assertRaisesRegex(RuntimeError, "corrupt block"):
+            score.assemble_score(tasks, BLOCK_NUMS)
+
+    def test_failed_checks(self):
+        """Tests that failing results fail the submission."""
+        tasks = make_tasks(check_compressed_integrity=["mismatch", ""])
+        with self.assertRaises(AssertionError):
+            score.assemble_score(tasks, BLOCK_NUMS)
+
+        tasks = make_tasks(check_ssim=0.5)
+        with self.assertRaises(AssertionError):
+            score.assemble_score(tasks, BLOCK_NUMS)
+
+        errors = {m: tol + 1 for m, tol in score.ERROR_TOLS.items()}
+        tasks = make_tasks(check_segmentation_consistency=errors)
+        with self.assertRaises(ValueError):
+            score.assemble_score(tasks, BLOCK_NUMS)
+
+
+class ScoreDistributedTest(unittest.TestCase):
+    """Tests scoring a submission through a shared work queue."""
+
+    def setUp(self):
+        """Writes a submission that contains every required file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "tasks.db")
+        self.zip_path = os.path.join(self.tmp_dir.name, "submission.zip")
+        self.write_submission()
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def write_submission(self, extra=b""):
+        """
+        Writes a submission, where "extra" is added to change its contents.
+        """
+        with zipfile.ZipFile(self.zip_path, "w") as z:
+            for num in BLOCK_NUMS:
+                z.writestr(f"compressed_{num}.zarr/.zarray", extra)
+                z.writestr(f"decompressed_{num}.tiff", b"")
+                z.writestr(f"segmentation_{num}.tiff", b"")
+                z.writestr(f"skeletons_{num}.zip", b"")
+
+    def score(self, timeout=60):
+        """Scores the submission with the validation blocks."""
+        return score.score_distributed(
+            self.zip_path,
+            self.db_path,
+            use_test_blocks=False,
+            poll_interval=0.05,
+            timeout=timeout,
+        )
+
+    def test_score_distributed(self):
+        """Tests scoring with a worker started before the submission."""
+        worker = threading.Thread(
+            target=work_queue.run_worker,
+            args=(self.db_path, TASK_FNS),
+            kwargs={"poll_interval": 0.05},
+        )
+        worker.start()
+        self.assertAlmostEqual(self.score(), 2.0)
+        worker.join(timeout=60)
+
+        # Resubmission is not scored with the previous results
+        self.write_submission(extra=b"changed")
+        with self.assertRaises(TimeoutError):
+            self.score(timeout=0.2)
+
+    def test_timeout(self):
+        """Tests that the coordinator stops waiting without workers."""
+        with self.assertRaisesRegex(TimeoutError, "20 tasks are unfinished"):
+            self.score(timeout=0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests for tensorstore helper routines."""
+
+from concurrent.futures import CancelledError
+
+import numpy as np
+import os
+import tempfile
+import tensorstore as ts
+import threading
+import unittest
+
+from image_compression_challenge import utils
+
+
+class TensorstoreTest(unittest.TestCase):
+    """Tests reading Zarr volumes with the tensorstore file driver."""
+
+    def setUp(self):
+        """Writes a Zarr volume with shape (1, 1, Z, Y, X)."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.img_path = os.path.join(self.tmp_dir.name, "input.zarr", "0")
+        self.img = np.random.default_rng(0).integers(
+            0, 1000, size=(1, 1, 12, 8, 6), dtype=np.uint16
+        )
+        spec = {
+            "driver": "zarr",
+            "kvstore": {"driver": "file", "path": self.img_path},
+            "metadata": {
+                "shape": list(self.img.shape),
+                "chunks": [1, 1, 3, 4, 6],
+                "dtype": "<u2",
+            },
+            "create": True,
+        }
+        ts.open(spec).result().write(self.img).result()
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_get_tensorstore_args(self):
+        """Tests that the S3 endpoint is added to the spec."""
+        args = utils.get_tensorstore_args(
+            "s3://bucket/block/input.zarr/0",
+            s3_endpoint="http://localhost:9000",
+        )
+        self.assertEqual(args["kvstore"]["bucket"], "bucket")
+        self.assertEqual(args["kvstore"]["endpoint"], "http://localhost:9000")
+        self.assertNotIn("context", args)
+
+    def test_get_tensorstore_context(self):
+        """Tests that resources are set on a single shared context."""
+        context = utils.get_tensorstore_context(
+            cache_pool_bytes=1024, s3_request_concurrency=8
+        )
+        self.assertIsInstance(context, ts.Context)
+        spec = context.spec.to_json()
+        self.assertEqual(spec["cache_pool"]["total_bytes_limit"], 1024)
+        self.assertEqual(spec["s3_request_concurrency"]["limit"], 8)
+        self.assertNotIn("file_io_concurrency", spec)
+
+        # Open several images with the same context
+        img = utils.open_zarr(self.img_path, context=context)
+        other_img = utils.open_zarr(self.img_path, context=context)
+        np.testing.assert_array_equal(img.read().result(), self.img)
+        np.testing.assert_array_equal(other_img.read().result(), self.img)
+
+    def test_read_zarr(self):
+        """Tests reading a Zarr volume with a custom context."""
+        context = utils.get_tensorstore_context(
+            data_copy_concurrency=2, file_io_concurrency=2
+        )
+        img = utils.read_zarr(self.img_path, context=context)
+        np.testing.assert_array_equal(img, self.img)
+
+    def test_iter_zarr_slabs(self):
+        """Tests that prefetched slabs cover the volume in order."""
+        img = utils.open_zarr(self.img_path)
+        slabs = list(utils.iter_zarr_slabs(img, prefetch=1))
+        self.assertEqual([s.shape[2] for s in slabs], [3, 3, 3, 3])
+        np.testing.assert_array_equal(np.concatenate(slabs, 2), self.img)
+
+    def test_read_zarr_downsampled_2x(self):
+        """Tests that slab-wise downsampling matches the full volume."""
+        img = utils.read_zarr_downsampled_2x(self.img_path)
+        expected = utils.downsample_mean_2x(self.img[0, 0])
+        np.testing.assert_array_equal(img, expected)
+
+    def test_stop_reading(self):
+        """Tests that a read is stopped once the stop event is set."""
+        stop_event = threading.Event()
+        stop_event.set()
+        with self.assertRaises(CancelledError):
+            utils.read_zarr_downsampled_2x(
+                self.img_path, stop_event=stop_event
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""Tests for the SQLite work queue shared by scoring nodes."""
+
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+
+from image_compression_challenge import work_queue
+
+BLOCK_NUMS = ["000", "001", "002", "003"]
+CHECK_NAMES = ["square", "flaky"]
+
+
+def square(zip_path, num):
+    """Returns a result that depends on the task."""
+    return int(num) ** 2
+
+
+def flaky(zip_path, num):
+    """Raises an error on every attempt for block "003"."""
+    if num == "003":
+        raise ValueError("corrupt block")
+    return {"num": num}
+
+
+def run_worker(db_path, worker):
+    """Runs a worker with the test task functions."""
+    task_fns = {"square": square, "flaky": flaky}
+    work_queue.run_worker(
+        db_path, task_fns, worker=worker, max_attempts=2, poll_interval=0.1
+    )
+
+
+class TaskQueueTest(unittest.TestCase):
+    """Tests claiming, leasing, and completing tasks."""
+
+    def setUp(self):
+        """Creates a work queue with a task for each block and check."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "tasks.db")
+        self.queue = work_queue.TaskQueue(self.db_path, max_attempts=2)
+        self.queue.enqueue("sub.zip", BLOCK_NUMS, CHECK_NAMES)
+
+    def tearDown(self):
+        """Removes the temporary directory."""
+        self.tmp_dir.cleanup()
+
+    def test_enqueue_is_idempotent(self):
+        """Tests that enqueuing a submission twice does not add tasks."""
+        self.queue.enqueue("sub.zip", BLOCK_NUMS, CHECK_NAMES)
+        self.assertEqual(len(self.queue.get_tasks("sub.zip")), 8)
+
+    def test_resubmission(self):
+        """Tests that a new version of a submission is scored again."""
+        old_tasks = list()
+        while (task := self.queue.claim("worker-1", 60)) is not None:
+            self.queue.complete(task, 0)
+            old_tasks.append(task)
+        self.assertTrue(self.queue.is_finished("sub.zip"))
+
+        self.queue.enqueue("sub.zip", BLOCK_NUMS, CHECK_NAMES, version="v2")
+        tasks = self.queue.get_tasks("sub.zip")
+        self.assertEqual(len(tasks), 8)
+        self.assertEqual({t["version"] for t in tasks}, {"v2"})
+        self.assertEqual({t["status"] for t in tasks}, {"pending"})
+        self.assertFalse(self.queue.is_finished("sub.zip"))
+
+        # A result of the previous version is not stored
+        self.assertFalse(self.queue.complete(old_tasks[0], 0))
+
+    def test_worker_started_before_enqueue(self):
+        """Tests that a worker waits for tasks instead of exiting."""
+        db_path = os.path.join(self.tmp_dir.name, "empty.db")
+        queue = work_queue.TaskQueue(db_path)
+        self.assertFalse(queue.is_finished())
+
+        thread = threading.Thread(target=run_worker, args=(db_path, "w0"))
+        thread.start()
+        thread.join(timeout=0.5)
+        self.assertTrue(thread.is_alive())
+
+        queue.enqueue("sub.zip", ["000", "001"], ["square"])
+        thread.join(timeout=60)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(queue.is_finished("sub.zip"))
+
+    def test_expired_lease(self):
+        """Tests that a task is reclaimed after its lease expires."""
+        db_path = os.path.join(self.tmp_dir.name, "single.db")
+        queue = work_queue.TaskQueue(db_path)
+        queue.enqueue("sub.zip", ["000"], ["square"])
+
+        task = queue.claim("worker-1", lease_seconds=-1)
+        reclaimed = queue.claim("worker-2", lease_seconds=60)
+        self.assertEqual(work_queue._key(task), work_queue._key(reclaimed))
+        self.assertIsNone(queue.claim("worker-3", lease_seconds=60))
+        self.assertFalse(queue.renew(task, "worker-1", 60))
+
+        # Both workers finish, but only the first result is stored
+        self.assertTrue(queue.complete(reclaimed, 1))
+        self.assertFalse(queue.complete(task, 2))
+        self.assertEqual(queue.get_tasks()[0]["result"], 1)
+
+    def test_multiple_workers(self):
+        """Tests that several worker processes finish every task."""
+        ctx = multiprocessing.get_context("spawn")
+        workers = [
+            ctx.Process(target=run_worker, args=(self.db_path, f"w{i}"))
+            for i in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            self.assertEqual(worker.exitcode, 0)
+
+        # Check results
+        self.assertTrue(self.queue.is_finished("sub.zip"))
+        tasks = {
+            (t["num"], t["check_name"]): t
+            for t in self.queue.get_tasks("sub.zip")
+        }
+        for num in BLOCK_NUMS:
+            self.assertEqual(tasks[(num, "square")]["result"], int(num) ** 2)
+
+        failed = tasks[("003", "flaky")]
+        self.assertEqual(failed["status"], "failed")
+        self.assertEqual(failed["attempts"], 2)
+        self.assertIn("corrupt block", failed["error"])
+        self.assertEqual(tasks[("002", "flaky")]["result"], {"num": "002"})
+
+
+if __name__ == "__main__":
+    unittest.main()